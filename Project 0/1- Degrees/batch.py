@@ -0,0 +1,128 @@
+"""
+Answers many degrees-of-separation queries from one load of the data.
+
+Each input line holds a source and a target, by name or IMDB id,
+separated by a tab. Each output line is a JSON object with the path
+found and the time taken to answer the query.
+"""
+
+import json
+import os
+import sys
+import time
+
+from forks import fork_map
+from snapshot import load_cached_graph
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python batch.py directory [pairs] [workers]")
+    directory = sys.argv[1]
+    pairs = sys.argv[2] if len(sys.argv) >= 3 else "-"
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else os.cpu_count()
+
+    # Load data once, before any worker is started
+    graph = load_cached_graph(directory)
+    graph.name_index()
+
+    if pairs == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(pairs, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    start = time.perf_counter()
+    latencies = []
+    for answer in answer_all(graph, queries, workers):
+        latencies.append(answer["latency_ms"])
+        print(json.dumps(answer))
+    seconds = time.perf_counter() - start
+
+    print(summary(latencies, seconds, workers), file=sys.stderr)
+
+
+def read_queries(lines):
+    """
+    Returns (source, target) pairs from tab-separated lines,
+    skipping blank lines.
+    """
+    queries = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) != 2:
+            sys.exit(f"Line {number}: expected source and target "
+                     "separated by a tab")
+        queries.append((fields[0].strip(), fields[1].strip()))
+    return queries
+
+
+def answer_all(graph, queries, workers):
+    """
+    Yields the answer to each query, in order, using `workers` processes.
+    """
+    if len(queries) <= 1:
+        workers = 1
+    chunksize = max(1, len(queries) // (workers * 8))
+    yield from fork_map(answer, graph, queries, workers, chunksize=chunksize)
+
+
+def answer(graph, query):
+    """
+    Returns the JSON-ready answer to one (source, target) query.
+    """
+    start = time.perf_counter()
+    source, target = query
+    result = {"source": source, "target": target}
+
+    source_id, error = resolve(graph, source)
+    if error is None:
+        target_id, error = resolve(graph, target)
+    if error is not None:
+        result["error"] = error
+    else:
+        path = graph.bidirectional_shortest_path(source_id, target_id)
+        result["source_id"] = source_id
+        result["target_id"] = target_id
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+
+    result["latency_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def resolve(graph, person):
+    """
+    Returns `(person_id, error)` for a name or IMDB id.
+    """
+    if graph.person_index(person) is not None:
+        return person, None
+    person_ids = graph.person_ids_for_name(person)
+    if len(person_ids) == 0:
+        suggestions = [name for _, name, _ in
+                       graph.name_index().lookup(person, limit=3)]
+        return None, (f"Person not found: {person}. "
+                      f"Closest: {', '.join(suggestions) or 'none'}")
+    elif len(person_ids) > 1:
+        return None, f"Ambiguous name {person}: {', '.join(person_ids)}"
+    return person_ids[0], None
+
+
+def summary(latencies, seconds, workers):
+    """
+    Returns the aggregate throughput line for a finished run.
+    """
+    if not latencies:
+        return "No queries."
+    latencies = sorted(latencies)
+    median = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (f"{len(latencies)} queries in {seconds:.3f} s with "
+            f"{workers} workers: {len(latencies) / seconds:.1f} queries/s, "
+            f"median {median:.3f} ms, p99 {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+Benchmarks for the degrees search structures.
+
+Usage: python benchmark.py frontier [size ...]
+       python benchmark.py search directory [pairs]
+       python benchmark.py graph directory [pairs]
+       python benchmark.py snapshot directory
+       python benchmark.py landmarks directory [count] [pairs]
+       python benchmark.py suite directory [pairs] [output]
+       python benchmark.py compare old new
+
+Use generate.py to create data at larger scales than `small/`.
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import degrees
+from graph import load_graph
+from landmarks import LandmarkIndex
+from snapshot import load_cached_graph
+from util import Node, QueueFrontier
+
+# Largest frontier the list-based implementation is timed at, since its
+# cost grows quadratically with the number of nodes
+LIST_FRONTIER_LIMIT = 10000
+
+
+class ListQueueFrontier():
+    """
+    The original list-based queue frontier, kept for comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def time_frontier(frontier, size):
+    """
+    Returns the seconds taken to push `size` nodes through `frontier`,
+    checking membership before every add the way `shortest_path` does.
+    """
+    start = time.perf_counter()
+    for state in range(size):
+        if not frontier.contains_state(state):
+            frontier.add(Node(state=state, parent=None, action=None))
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def benchmark_frontier(sizes):
+    """
+    Prints the cost of the deque and list frontiers for each size.
+    """
+    print(f"{'nodes':>10} {'frontier':>10} {'seconds':>10} {'ns/node':>10}")
+    for size in sizes:
+        implementations = [("deque", QueueFrontier)]
+        if size <= LIST_FRONTIER_LIMIT:
+            implementations.append(("list", ListQueueFrontier))
+        for label, implementation in implementations:
+            seconds = time_frontier(implementation(), size)
+            print(f"{size:>10} {label:>10} {seconds:>10.3f} "
+                  f"{seconds / size * 1e9:>10.0f}")
+
+
+def benchmark_search(directory, pairs):
+    """
+    Compares one-sided and bidirectional search on random pairs of people,
+    checking that both find paths of the same length.
+    """
+    degrees.load_data(directory)
+    people = sorted(degrees.people)
+    rng = random.Random(0)
+
+    totals = {"bfs": [0, 0.0], "bidirectional": [0, 0.0]}
+    for _ in range(pairs):
+        source, target = rng.choice(people), rng.choice(people)
+
+        stats = {}
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, stats)
+        totals["bfs"][0] += stats["explored"]
+        totals["bfs"][1] += time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        other = degrees.bidirectional_shortest_path(source, target, stats)
+        totals["bidirectional"][0] += (stats["source_explored"]
+                                       + stats["target_explored"])
+        totals["bidirectional"][1] += time.perf_counter() - start
+
+        # shortest_path never returns a path from a person to themselves
+        lengths = [None if p is None else len(p) for p in (path, other)]
+        if source != target and lengths[0] != lengths[1]:
+            raise Exception(f"paths differ for {source} and {target}")
+
+    print(f"{'search':>14} {'explored/query':>15} {'ms/query':>10}")
+    for label, (explored, seconds) in totals.items():
+        print(f"{label:>14} {explored / pairs:>15.1f} "
+              f"{seconds / pairs * 1000:>10.3f}")
+
+
+def measure_load(load, directory):
+    """
+    Returns `(result, seconds, bytes)` for `load(directory)`, where bytes
+    is the memory still held once loading is done.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load(directory)
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, size
+
+
+def benchmark_graph(directory, pairs):
+    """
+    Compares memory and query latency of the dictionaries filled by
+    `degrees.load_data` with the compact `Graph`.
+    """
+    _, dict_seconds, dict_bytes = measure_load(degrees.load_data, directory)
+    graph, graph_seconds, graph_bytes = measure_load(load_graph, directory)
+
+    people = sorted(degrees.people)
+    rng = random.Random(0)
+    queries = [(rng.choice(people), rng.choice(people)) for _ in range(pairs)]
+
+    def per_query(function, arguments):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(*argument)
+        return (time.perf_counter() - start) / len(arguments) * 1000
+
+    rows = [
+        ("dicts", dict_seconds, dict_bytes,
+         per_query(degrees.neighbors_for_person, [(s,) for s, _ in queries]),
+         per_query(degrees.shortest_path, queries)),
+        ("graph", graph_seconds, graph_bytes,
+         per_query(graph.neighbors_for_person, [(s,) for s, _ in queries]),
+         per_query(graph.shortest_path, queries)),
+    ]
+    print(f"{'structure':>10} {'load s':>8} {'MiB':>8} "
+          f"{'neighbors ms':>13} {'path ms':>10}")
+    for label, seconds, size, neighbors, path in rows:
+        print(f"{label:>10} {seconds:>8.3f} {size / 2 ** 20:>8.2f} "
+              f"{neighbors:>13.4f} {path:>10.3f}")
+
+
+def benchmark_snapshot(directory):
+    """
+    Times startup from the CSVs, from a fresh snapshot, and the first
+    query answered after loading the snapshot.
+    """
+    path = os.path.join(directory, "degrees.snapshot")
+    if os.path.exists(path):
+        os.remove(path)
+
+    start = time.perf_counter()
+    load_cached_graph(directory)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = load_cached_graph(directory)
+    warm = time.perf_counter() - start
+
+    source, target = graph.person_ids[0], graph.person_ids[-1]
+    start = time.perf_counter()
+    graph.shortest_path(source, target)
+    query = time.perf_counter() - start
+
+    print(f"CSV load and snapshot write: {cold * 1000:.2f} ms")
+    print(f"Snapshot load: {warm * 1000:.2f} ms "
+          f"({os.path.getsize(path) / 2 ** 20:.2f} MiB)")
+    print(f"First query after snapshot load: {query * 1000:.2f} ms")
+
+
+def benchmark_landmarks(directory, count, pairs):
+    """
+    Builds a landmark index and compares its bounds and guided search
+    with plain and bidirectional BFS on random pairs.
+    """
+    graph = load_cached_graph(directory)
+
+    start = time.perf_counter()
+    index = LandmarkIndex.build(graph, count)
+    build = time.perf_counter() - start
+    size = len(bytes(index.landmarks)) + len(bytes(index.distances))
+    print(f"{len(graph.person_ids)} people, {count} landmarks: "
+          f"built in {build:.2f} s, {size / 2 ** 20:.2f} MiB")
+
+    rng = random.Random(0)
+    queries = [(rng.choice(graph.person_ids), rng.choice(graph.person_ids))
+               for _ in range(pairs)]
+
+    start = time.perf_counter()
+    exact = 0
+    for source, target in queries:
+        lower, upper = index.bounds(source, target)
+        exact += lower == upper
+    bounds = (time.perf_counter() - start) / pairs * 1000
+    print(f"Bounds: {bounds:.4f} ms/query, exact for {exact} of {pairs}")
+
+    searches = [
+        ("bfs", graph.shortest_path),
+        ("bidirectional", graph.bidirectional_shortest_path),
+        ("landmarks", index.shortest_path),
+    ]
+    print(f"{'search':>14} {'ms/query':>10} {'speedup':>8}")
+    baseline = None
+    for label, search in searches:
+        start = time.perf_counter()
+        for source, target in queries:
+            search(source, target)
+        seconds = (time.perf_counter() - start) / pairs
+        baseline = baseline or seconds
+        print(f"{label:>14} {seconds * 1000:>10.3f} "
+              f"{baseline / seconds:>7.1f}x")
+
+
+def percentiles(samples):
+    """
+    Returns summary statistics of latency samples in milliseconds.
+    """
+    samples = sorted(samples)
+
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    return {
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": samples[-1],
+    }
+
+
+def measure_loader(loader, directory):
+    """
+    Loads `directory` with `loader` in this process and returns its load
+    time and the process's peak resident memory.
+    """
+    loaders = {
+        "dicts": degrees.load_data,
+        "graph": load_graph,
+        "snapshot": load_cached_graph,
+    }
+    start = time.perf_counter()
+    loaders[loader](directory)
+    seconds = time.perf_counter() - start
+
+    try:
+        import resource
+    except ImportError:
+        return {"seconds": seconds, "peak_rss_mib": None}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    peak = peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+    return {"seconds": seconds, "peak_rss_mib": peak}
+
+
+def run_loader(loader, directory):
+    """
+    Measures a loader in a fresh interpreter, so each peak RSS figure
+    covers one loader only.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, "load", loader, directory],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def benchmark_suite(directory, pairs, output=None):
+    """
+    Measures load time, peak RSS and path latency percentiles for every
+    loader and search, and optionally saves them as JSON to `output`.
+    """
+    results = {
+        "directory": directory,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": current_commit(),
+        "loaders": {},
+        "searches": {},
+    }
+
+    snapshot = os.path.join(directory, "degrees.snapshot")
+    if os.path.exists(snapshot):
+        os.remove(snapshot)
+    loaders = results["loaders"]
+    loaders["dicts"] = run_loader("dicts", directory)
+    loaders["graph"] = run_loader("graph", directory)
+    loaders["snapshot_cold"] = run_loader("snapshot", directory)
+    loaders["snapshot"] = run_loader("snapshot", directory)
+
+    degrees.load_data(directory)
+    graph = load_cached_graph(directory)
+    results["people"] = len(graph.person_ids)
+    results["movies"] = len(graph.movie_ids)
+    results["stars"] = len(graph.person_movies)
+
+    rng = random.Random(0)
+    queries = [(rng.choice(graph.person_ids), rng.choice(graph.person_ids))
+               for _ in range(pairs)]
+    searches = {
+        "dicts_bfs": degrees.shortest_path,
+        "dicts_bidirectional": degrees.bidirectional_shortest_path,
+        "graph_bfs": graph.shortest_path,
+        "graph_bidirectional": graph.bidirectional_shortest_path,
+    }
+    for label, search in searches.items():
+        samples = []
+        for source, target in queries:
+            start = time.perf_counter()
+            search(source, target)
+            samples.append((time.perf_counter() - start) * 1000)
+        results["searches"][label] = percentiles(samples)
+
+    print(f"{results['people']} people, {results['movies']} movies, "
+          f"{results['stars']} stars")
+    print(f"{'loader':>20} {'seconds':>10} {'peak MiB':>10}")
+    for label, loader in results["loaders"].items():
+        peak = loader["peak_rss_mib"]
+        print(f"{label:>20} {loader['seconds']:>10.3f} "
+              f"{'-' if peak is None else f'{peak:.1f}':>10}")
+    print(f"{'search':>20} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}")
+    for label, search in results["searches"].items():
+        print(f"{label:>20} {search['p50_ms']:>10.3f} "
+              f"{search['p90_ms']:>10.3f} {search['p99_ms']:>10.3f}")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+def compare(old, new):
+    """
+    Prints how every measurement changed between two suite results.
+    """
+    with open(old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{'measurement':>34} {'old':>10} {'new':>10} {'ratio':>7}")
+    for group in ["loaders", "searches"]:
+        for label in old[group]:
+            if label not in new[group]:
+                continue
+            for key, before in old[group][label].items():
+                after = new[group][label].get(key)
+                if not before or after is None:
+                    continue
+                print(f"{label + ' ' + key:>34} {before:>10.3f} "
+                      f"{after:>10.3f} {after / before:>6.2f}x")
+
+
+def current_commit():
+    """
+    Returns the git commit of this checkout, or None outside git.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    usage = ("Usage: python benchmark.py frontier [size ...]\n"
+             "       python benchmark.py search directory [pairs]\n"
+             "       python benchmark.py graph directory [pairs]\n"
+             "       python benchmark.py snapshot directory\n"
+             "       python benchmark.py landmarks directory [count] [pairs]\n"
+             "       python benchmark.py suite directory [pairs] [output]\n"
+             "       python benchmark.py compare old new")
+    if len(sys.argv) < 2:
+        sys.exit(usage)
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == "frontier":
+        sizes = [int(size) for size in args] or [
+            1000, 10000, 100000, 1000000
+        ]
+        benchmark_frontier(sizes)
+    elif command == "search" and len(args) in [1, 2]:
+        pairs = int(args[1]) if len(args) == 2 else 100
+        benchmark_search(args[0], pairs)
+    elif command == "graph" and len(args) in [1, 2]:
+        pairs = int(args[1]) if len(args) == 2 else 100
+        benchmark_graph(args[0], pairs)
+    elif command == "snapshot" and len(args) == 1:
+        benchmark_snapshot(args[0])
+    elif command == "landmarks" and len(args) in [1, 2, 3]:
+        count = int(args[1]) if len(args) >= 2 else 16
+        pairs = int(args[2]) if len(args) == 3 else 100
+        benchmark_landmarks(args[0], count, pairs)
+    elif command == "suite" and len(args) in [1, 2, 3]:
+        pairs = int(args[1]) if len(args) >= 2 else 100
+        output = args[2] if len(args) == 3 else None
+        benchmark_suite(args[0], pairs, output)
+    elif command == "compare" and len(args) == 2:
+        compare(args[0], args[1])
+    elif command == "load" and len(args) == 2:
+        print(json.dumps(measure_loader(args[0], args[1])))
+    else:
+        sys.exit(usage)
+
+
+if __name__ == "__main__":
+    main()
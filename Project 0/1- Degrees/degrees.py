@@ -1,6 +1,10 @@
 import csv
 import sys
 
+from ingest import load_stars
+from landmarks import load_index
+from names import NameIndex
+from snapshot import load_cached_graph
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,64 +16,141 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Prefix and fuzzy index over the names of `people`, built by load_data
+name_index = None
 
-def load_data(directory):
+
+def load_data(directory, workers=1, stats=None):
     """
     Load data from CSV files into memory.
+
+    stars.csv is parsed in this process by default, or by up to `workers`
+    forked processes, all CPUs if `workers` is None.
+    If `stats` is a dictionary, the stars rows read and skipped and the
+    rows per second are recorded in it.
     """
-    # Load people
+    # Load people, then index all of their names at once
+    global name_index
+    name_index = None
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+        add_people(csv.DictReader(f))
+    name_index = NameIndex.from_people(people)
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        add_movies(csv.DictReader(f))
+
+    # Load stars
+    load_stars(f"{directory}/stars.csv", people, movies, workers, stats)
+
+
+def add_people(rows):
+    """
+    Adds or updates people from rows with id, name and birth.
+    """
+    for row in rows:
+        person = people.get(row["id"])
+        if person is None:
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+        else:
+            # Keep an updated person's movies, but not their old name
+            names[person["name"].lower()].discard(row["id"])
+            if not names[person["name"].lower()]:
+                del names[person["name"].lower()]
+            if name_index is not None:
+                name_index.remove(row["id"], person["name"])
+            person["name"] = row["name"]
+            person["birth"] = row["birth"]
+        if name_index is not None:
+            name_index.add(row["id"], row["name"])
+        if row["name"].lower() not in names:
+            names[row["name"].lower()] = {row["id"]}
+        else:
+            names[row["name"].lower()].add(row["id"])
 
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+
+def add_movies(rows):
+    """
+    Adds or updates movies from rows with id, title and year.
+    """
+    for row in rows:
+        movie = movies.get(row["id"])
+        if movie is None:
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
                 "stars": set()
             }
+        else:
+            movie["title"] = row["title"]
+            movie["year"] = row["year"]
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+def add_stars(rows):
+    """
+    Adds rows with person_id and movie_id, skipping rows naming an
+    unknown person or movie.
+    """
+    for row in rows:
+        try:
+            person = people[row["person_id"]]
+            movie = movies[row["movie_id"]]
+        except KeyError:
+            continue
+        person["movies"].add(row["movie_id"])
+        movie["stars"].add(row["person_id"])
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    flags = {arg for arg in args if arg.startswith("--")}
+    args = [arg for arg in args if not arg.startswith("--")]
+    if len(args) > 1 or not flags <= {
+        "--bidirectional", "--compact", "--landmarks", "--parallel"
+    }:
+        sys.exit("Usage: python degrees.py [directory] "
+                 "[--bidirectional] [--compact] [--landmarks] [--parallel]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    if "--landmarks" in flags:
+        graph = load_cached_graph(directory)
+        index = load_index(directory, graph)
+        if index is None:
+            sys.exit("No current landmark index. "
+                     f"Run: python landmarks.py {directory}")
+        person, movie = graph.person, graph.movie
+        search = index.shortest_path
+    elif "--compact" in flags:
+        graph = load_cached_graph(directory)
+        person, movie = graph.person, graph.movie
+        search = (graph.bidirectional_shortest_path
+                  if "--bidirectional" in flags else graph.shortest_path)
+    else:
+        graph = None
+        stats = {}
+        load_data(directory, None if "--parallel" in flags else 1, stats)
+        print(f"Loaded {stats['rows']} stars at "
+              f"{stats['rows_per_second']:.0f} rows/s, "
+              f"{stats['skipped']} skipped.")
+        person, movie = people.__getitem__, movies.__getitem__
+        search = (bidirectional_shortest_path
+                  if "--bidirectional" in flags else shortest_path)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), graph)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), graph)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,22 +159,30 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+            person1 = person(path[i][1])["name"]
+            person2 = person(path[i + 1][1])["name"]
+            title = movie(path[i + 1][0])["title"]
+            print(f"{i + 1}: {person1} and {person2} starred in {title}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If no possible path, returns None. A person is zero degrees from
+    themselves, so the path from a person to themselves is empty.
+
+    If `stats` is a dict, the number of people expanded is stored
+    under "explored".
     """
 
     # Keep track how many nodes have been explored
     num_explored = 0
+    if stats is not None:
+        stats["explored"] = 0
+    if source == target:
+        return []
     
      # Initialize frontier to just the starting position
     start = Node(state=source, parent=None, action=None)
@@ -112,6 +201,8 @@ def shortest_path(source, target):
         # Choose a node from the frontier
         node = frontier.remove()
         num_explored += 1
+        if stats is not None:
+            stats["explored"] = num_explored
         
         # Actor explored
         explored.add(node.state)
@@ -134,31 +225,115 @@ def shortest_path(source, target):
                 frontier.add(child)
         
 
-def person_id_for_name(name):
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the same path as `shortest_path`, searching breadth-first
+    from both `source` and `target` and always growing the smaller side.
+
+    If `stats` is a dict, the number of people expanded from each side
+    is stored under "source_explored" and "target_explored".
+    """
+    if stats is not None:
+        stats["source_explored"] = 0
+        stats["target_explored"] = 0
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # leads back towards the side's starting person
+    source_parents = {source: None}
+    target_parents = {target: None}
+    source_level = [source]
+    target_level = [target]
+
+    while source_level and target_level:
+
+        # Expand a whole level of the smaller side
+        from_source = len(source_level) <= len(target_level)
+        if from_source:
+            level, parents, other = source_level, source_parents, target_parents
+        else:
+            level, parents, other = target_level, target_parents, source_parents
+
+        side = "source_explored" if from_source else "target_explored"
+        next_level = []
+        meeting = None
+        for person_id in level:
+            if stats is not None:
+                stats[side] += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                next_level.append(neighbor)
+                if neighbor in other:
+                    meeting = neighbor
+                    break
+            if meeting is not None:
+                break
+
+        if meeting is not None:
+            # Walk back to the source, then forward to the target
+            path = []
+            person_id = meeting
+            while source_parents[person_id] is not None:
+                movie_id, previous = source_parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = previous
+            path.reverse()
+            person_id = meeting
+            while target_parents[person_id] is not None:
+                movie_id, following = target_parents[person_id]
+                path.append((movie_id, following))
+                person_id = following
+            return path
+
+        if from_source:
+            source_level = next_level
+        else:
+            target_level = next_level
+
+    return None
+
+
+def person_id_for_name(name, graph=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Names are looked up in `graph` if given, else in `names`. If nobody
+    has the exact name, the closest names are offered instead.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        index = graph.name_index() if graph is not None else name_index
+        if index is None:
+            return None
+        person_ids = [person_id for person_id, _, _ in index.lookup(name)]
+        if len(person_ids) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
     else:
         return person_ids[0]
 
+    for person_id in person_ids:
+        person = graph.person(person_id) if graph else people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
 
 def neighbors_for_person(person_id):
     """
@@ -0,0 +1,53 @@
+"""
+Pools of worker processes forked from this one.
+
+A forked worker inherits the memory of the process that forked it, so
+data already loaded is shared with it copy-on-write instead of being
+pickled to it. `fork_map` hands its function and data to the workers
+through a module global, which they inherit on fork, and runs in this
+process instead when one worker is asked for or processes cannot be
+forked.
+"""
+
+import multiprocessing
+
+# Function and data of the running fork_map, inherited by its workers
+job = None
+
+
+def forkable():
+    """
+    Returns True if worker processes can be forked on this platform.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def fork_map(function, shared, tasks, workers, ordered=True, chunksize=1):
+    """
+    Yields `function(shared, task)` for each task, from up to `workers`
+    forked processes, in the order of `tasks` unless `ordered` is false.
+    """
+    if workers <= 1 or not forkable():
+        for task in tasks:
+            yield function(shared, task)
+        return
+
+    global job
+    job = (function, shared)
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            if ordered:
+                yield from pool.imap(run, tasks, chunksize)
+            else:
+                yield from pool.imap_unordered(run, tasks, chunksize)
+    finally:
+        job = None
+
+
+def run(task):
+    """
+    Runs one task of the fork_map the worker was forked for.
+    """
+    function, shared = job
+    return function(shared, task)
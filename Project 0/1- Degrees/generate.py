@@ -0,0 +1,110 @@
+"""
+Generates synthetic degrees data in the same CSV schema as `small/`.
+
+Cast sizes follow a power law, so most movies have a handful of stars
+and a few have hundreds, and people are picked with a skew towards a
+small group of prolific actors.
+"""
+
+import csv
+import os
+import random
+import sys
+
+FIRST_NAMES = [
+    "Alex", "Anna", "Ben", "Carla", "Chris", "Dana", "Emma", "Frank",
+    "Grace", "Hugo", "Ines", "Jack", "Julia", "Kevin", "Laura", "Leo",
+    "Maria", "Mark", "Nina", "Omar", "Paula", "Peter", "Rosa", "Sam",
+    "Sara", "Tom", "Uma", "Victor", "Wendy", "Yusuf",
+]
+LAST_NAMES = [
+    "Adams", "Baker", "Bacon", "Costa", "Cruise", "Diaz", "Evans", "Field",
+    "Garcia", "Hanks", "Ito", "Jones", "Kim", "Lopez", "Moore", "Nguyen",
+    "Novak", "Ortiz", "Patel", "Quinn", "Rossi", "Silva", "Smith", "Tanaka",
+    "Turner", "Walker", "Watson", "Wright", "Young", "Zhang",
+]
+TITLE_WORDS = [
+    "Apollo", "Crimson", "Dark", "Echo", "Forrest", "Golden", "Harbor",
+    "Iron", "Last", "Lost", "Midnight", "Night", "Ocean", "Princess",
+    "Quiet", "River", "Silent", "Storm", "Summer", "Winter",
+]
+
+# Shape of the cast size power law, and the largest cast allowed
+CAST_SHAPE = 1.6
+MAX_CAST = 500
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generate.py directory stars [seed]")
+    directory = sys.argv[1]
+    stars = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    people, movies = generate(directory, stars, seed)
+    print(f"Wrote {people} people, {movies} movies and {stars} stars "
+          f"to {directory}")
+
+
+def generate(directory, stars, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with `stars` star rows to
+    `directory`, and returns the number of people and movies written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    people = max(2, stars // 4)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,name,birth\n")
+        for person in range(people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.9:
+                name += f" {person_suffix(person)}"
+            writer.writerow([person + 1, name, rng.randint(1900, 2005)])
+
+    movies = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+         open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as stars_file:
+        movie_writer = csv.writer(movies_file, quoting=csv.QUOTE_NONNUMERIC)
+        star_writer = csv.writer(stars_file)
+        movies_file.write("id,title,year\n")
+        star_writer.writerow(["person_id", "movie_id"])
+
+        written = 0
+        while written < stars:
+            movies += 1
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+            movie_writer.writerow([movies, f"{title} {movies}",
+                                   rng.randint(1920, 2023)])
+
+            cast = min(MAX_CAST, people, stars - written,
+                       int(rng.paretovariate(CAST_SHAPE) * 2))
+            cast_members = set()
+            while len(cast_members) < cast:
+                cast_members.add(int(people * rng.random() ** 2) + 1)
+            for person in cast_members:
+                star_writer.writerow([person, movies])
+            written += cast
+
+    return people, movies
+
+
+def person_suffix(person):
+    """
+    Returns a letter code unique to each person, like "A" or "QX".
+    """
+    letters = ""
+    person += 1
+    while person:
+        person, digit = divmod(person - 1, 26)
+        letters = chr(ord("A") + digit) + letters
+    return letters
+
+
+if __name__ == "__main__":
+    main()
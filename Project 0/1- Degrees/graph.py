@@ -0,0 +1,524 @@
+"""
+Compact, integer-indexed form of the degrees data.
+
+People and movies are numbered densely in order of their IMDB ids, and
+the person -> movies and movie -> stars relations are stored CSR-style:
+one flat `array` of neighbors per relation, plus an offsets array where
+the neighbors of `i` are `neighbors[offsets[i]:offsets[i + 1]]`.
+
+Rows applied after the tables are built go into small overlays, so the
+tables themselves are never rewritten; `compact` folds them back in.
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+
+from names import NameIndex
+
+
+class Graph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 movie_offsets, person_movies, star_offsets, movie_stars,
+                 name_order):
+        """
+        Create a graph from already built tables.
+            - `person_ids`, `movie_ids`: IMDB ids in ascending order
+            - `person_names`, `person_births`, `movie_titles`,
+              `movie_years`: per-index details
+            - `movie_offsets`, `person_movies`: movies of each person
+            - `star_offsets`, `movie_stars`: stars of each movie
+            - `name_order`: person indexes sorted by lowercase name
+        """
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.movie_offsets = movie_offsets
+        self.person_movies = person_movies
+        self.star_offsets = star_offsets
+        self.movie_stars = movie_stars
+        self.name_order = name_order
+
+        # Overlays for rows added since the tables were built
+        self.version = 0
+        self.base_people = len(person_ids)
+        self.base_movies = len(movie_ids)
+        self.base_names = person_names
+        self.added_person_ids = {}
+        self.added_movie_ids = {}
+        self.added_names = {}
+        self.added_movies = {}
+        self.added_stars = {}
+
+        # Prefix and fuzzy name index, built on first use
+        self.names = None
+
+    @classmethod
+    def build(cls, people, movies, stars):
+        """
+        Graph.build(people, movies, stars) builds a graph from
+        `(id, name, birth)` and `(id, title, year)` rows and
+        `(person_id, movie_id)` pairs. Pairs naming an unknown person
+        or movie are skipped, as are repeated pairs. A person or movie
+        listed more than once keeps its last row, as an update appended
+        to the CSVs does in `degrees.add_people`.
+        """
+        people = sorted({row[0]: row for row in people}.values())
+        movies = sorted({row[0]: row for row in movies}.values())
+        person_ids = [row[0] for row in people]
+        movie_ids = [row[0] for row in movies]
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Keep each known (person, movie) pair once
+        pairs = set()
+        for person_id, movie_id in stars:
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is not None and movie is not None:
+                pairs.add((person, movie))
+
+        movie_offsets, person_movies = csr(len(person_ids), pairs)
+        star_offsets, movie_stars = csr(
+            len(movie_ids), ((movie, person) for person, movie in pairs)
+        )
+
+        person_names = [row[1] for row in people]
+        name_order = array("i", sorted(
+            range(len(person_names)), key=lambda i: person_names[i].lower()
+        ))
+
+        return cls(
+            person_ids, person_names, [row[2] for row in people],
+            movie_ids, [row[1] for row in movies], [row[2] for row in movies],
+            movie_offsets, person_movies, star_offsets, movie_stars,
+            name_order
+        )
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Graph.from_dicts(people, movies) converts the `people` and
+        `movies` dictionaries filled by `degrees.load_data`.
+        """
+        return cls.build(
+            [(person_id, person["name"], person["birth"])
+             for person_id, person in people.items()],
+            [(movie_id, movie["title"], movie["year"])
+             for movie_id, movie in movies.items()],
+            [(person_id, movie_id)
+             for person_id, person in people.items()
+             for movie_id in person["movies"]]
+        )
+
+    def compact(self):
+        """
+        Returns a new graph with every added row folded into the tables.
+        """
+        people = range(len(self.person_ids))
+        return Graph.build(
+            [(self.person_ids[i], self.person_names[i], self.person_births[i])
+             for i in people],
+            [(self.movie_ids[i], self.movie_titles[i], self.movie_years[i])
+             for i in range(len(self.movie_ids))],
+            [(self.person_ids[i], self.movie_ids[movie])
+             for i in people for movie in self.movies_of(i)]
+        )
+
+    def add_people(self, rows):
+        """
+        Adds or updates people from rows with id, name and birth, like
+        `degrees.add_people`.
+        """
+        self.extend_tables()
+        changed = False
+        for row in rows:
+            changed = True
+            person = self.person_index(row["id"])
+            if person is None:
+                person = len(self.person_ids)
+                self.person_ids.append(row["id"])
+                self.person_names.append(row["name"])
+                self.person_births.append(row["birth"])
+                self.added_person_ids[row["id"]] = person
+                self.added_movies[person] = []
+            else:
+                old = self.person_names[person].lower()
+                if person in self.added_names.get(old, ()):
+                    self.added_names[old].remove(person)
+                if self.names is not None:
+                    self.names.remove(row["id"], self.person_names[person])
+                self.person_names[person] = row["name"]
+                self.person_births[person] = row["birth"]
+
+            if self.names is not None:
+                self.names.add(row["id"], row["name"])
+
+            # Only names the name order does not already know are listed
+            name = row["name"].lower()
+            if person >= self.base_people or (
+                self.base_names[person].lower() != name
+            ):
+                self.added_names.setdefault(name, []).append(person)
+        if changed:
+            self.version += 1
+
+    def add_movies(self, rows):
+        """
+        Adds or updates movies from rows with id, title and year.
+        """
+        self.extend_tables()
+        changed = False
+        for row in rows:
+            changed = True
+            movie = self.movie_index(row["id"])
+            if movie is None:
+                movie = len(self.movie_ids)
+                self.movie_ids.append(row["id"])
+                self.movie_titles.append(row["title"])
+                self.movie_years.append(row["year"])
+                self.added_movie_ids[row["id"]] = movie
+                self.added_stars[movie] = []
+            else:
+                self.movie_titles[movie] = row["title"]
+                self.movie_years[movie] = row["year"]
+        if changed:
+            self.version += 1
+
+    def add_stars(self, rows):
+        """
+        Adds rows with person_id and movie_id, skipping rows naming an
+        unknown person or movie and pairs already present.
+        """
+        changed = False
+        for row in rows:
+            if row["person_id"] is None or row["movie_id"] is None:
+                continue
+            person = self.person_index(row["person_id"])
+            movie = self.movie_index(row["movie_id"])
+            if person is None or movie is None:
+                continue
+            movies = self.added_movies.get(person)
+            if movies is None:
+                movies = self.added_movies[person] = list(
+                    self.movies_of(person)
+                )
+            if movie in movies:
+                continue
+            movies.append(movie)
+            stars = self.added_stars.get(movie)
+            if stars is None:
+                stars = self.added_stars[movie] = list(self.stars_of(movie))
+            stars.append(person)
+            changed = True
+        if changed:
+            self.version += 1
+
+    def extend_tables(self):
+        """
+        Makes the per-index tables appendable and writable.
+        """
+        for field in ["person_ids", "person_names", "person_births",
+                      "movie_ids", "movie_titles", "movie_years"]:
+            table = getattr(self, field)
+            if not isinstance(table, Extended):
+                setattr(self, field, Extended(table))
+
+    def person_index(self, person_id):
+        """
+        Returns the index of `person_id`, or None if it is unknown.
+        """
+        i = bisect_left(self.person_ids, person_id, 0, self.base_people)
+        if i < self.base_people and self.person_ids[i] == person_id:
+            return i
+        return self.added_person_ids.get(person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of `movie_id`, or None if it is unknown.
+        """
+        i = bisect_left(self.movie_ids, movie_id, 0, self.base_movies)
+        if i < self.base_movies and self.movie_ids[i] == movie_id:
+            return i
+        return self.added_movie_ids.get(movie_id)
+
+    def person(self, person_id):
+        """
+        Returns the name and birth of a person, as in `degrees.people`.
+        """
+        i = self.person_index(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns the title and year of a movie, as in `degrees.movies`.
+        """
+        i = self.movie_index(movie_id)
+        if i is None:
+            raise KeyError(movie_id)
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the ids of every person whose name matches `name`,
+        ignoring case.
+        """
+        name = name.lower()
+        order = self.name_order
+        names = self.base_names
+        i = bisect_left(order, name,
+                        key=lambda person: names[person].lower())
+        person_ids = []
+        while i < len(order) and names[order[i]].lower() == name:
+            # Skip people renamed since the name order was built
+            if self.person_names[order[i]].lower() == name:
+                person_ids.append(self.person_ids[order[i]])
+            i += 1
+        for person in self.added_names.get(name, ()):
+            person_ids.append(self.person_ids[person])
+        return person_ids
+
+    def name_index(self):
+        """
+        Returns the `names.NameIndex` of everyone in the graph, building
+        it the first time it is needed.
+        """
+        if self.names is None:
+            self.names = NameIndex.from_graph(self)
+        return self.names
+
+    def movies_of(self, person):
+        """
+        Returns the movie indexes of person index `person`.
+        """
+        movies = self.added_movies.get(person)
+        if movies is not None:
+            return movies
+        offsets = self.movie_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes of movie index `movie`.
+        """
+        stars = self.added_stars.get(movie)
+        if stars is not None:
+            return stars
+        offsets = self.star_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_of(self.person_index(person_id)):
+            movie_id = self.movie_ids[movie]
+            for person in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[person]))
+        return neighbors
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, like
+        `degrees.shortest_path`.
+
+        If no possible path, returns None, and if `source` is `target`,
+        the empty path.
+
+        If `stats` is a dict, the number of people expanded is stored
+        under "explored".
+        """
+        if stats is not None:
+            stats["explored"] = 0
+        if source == target:
+            return []
+        source = self.person_index(source)
+        target = self.person_index(target)
+
+        # Maps each reached person to the (movie, person) step before it
+        parents = {source: None}
+        # A movie's stars are all reached the first time it is expanded
+        movies_seen = set()
+        level = [source]
+
+        while level:
+            next_level = []
+            for person in level:
+                if stats is not None:
+                    stats["explored"] += 1
+                for movie in self.movies_of(person):
+                    if movie in movies_seen:
+                        continue
+                    movies_seen.add(movie)
+                    for neighbor in self.stars_of(movie):
+                        if neighbor in parents:
+                            continue
+                        parents[neighbor] = (movie, person)
+                        if neighbor == target:
+                            return self.path(parents, target)
+                        next_level.append(neighbor)
+            level = next_level
+
+        return None
+
+    def bidirectional_shortest_path(self, source, target, stats=None,
+                                    prune=None):
+        """
+        Returns the same path as `shortest_path`, searching from both ends
+        like `degrees.bidirectional_shortest_path`.
+
+        If given, `prune(person, depth, from_source)` is called before
+        expanding each person index `depth` steps from its side's end,
+        and people it returns True for are not expanded. It must not
+        prune people on shortest paths between the source and the target.
+        """
+        if stats is not None:
+            stats["source_explored"] = 0
+            stats["target_explored"] = 0
+        if source == target:
+            return []
+        source = self.person_index(source)
+        target = self.person_index(target)
+
+        # Search tree, expanded movies and current level of each side
+        source_side = ({source: None}, set(), [source])
+        target_side = ({target: None}, set(), [target])
+        depths = {True: 0, False: 0}
+
+        while source_side[2] and target_side[2]:
+
+            # Expand a whole level of the smaller side
+            from_source = len(source_side[2]) <= len(target_side[2])
+            if from_source:
+                (parents, movies_seen, level), other = source_side, target_side
+            else:
+                (parents, movies_seen, level), other = target_side, source_side
+            other_parents = other[0]
+            side = "source_explored" if from_source else "target_explored"
+            depth = depths[from_source]
+            depths[from_source] += 1
+
+            next_level = []
+            for person in level:
+                if prune is not None and prune(person, depth, from_source):
+                    continue
+                if stats is not None:
+                    stats[side] += 1
+                for movie in self.movies_of(person):
+                    if movie in movies_seen:
+                        continue
+                    movies_seen.add(movie)
+                    for neighbor in self.stars_of(movie):
+                        if neighbor in parents:
+                            continue
+                        parents[neighbor] = (movie, person)
+                        if neighbor in other_parents:
+                            return self.joined_path(
+                                source_side[0], target_side[0], neighbor
+                            )
+                        next_level.append(neighbor)
+
+            if from_source:
+                source_side = (parents, movies_seen, next_level)
+            else:
+                target_side = (parents, movies_seen, next_level)
+
+        return None
+
+    def path(self, parents, person):
+        """
+        Returns the (movie_id, person_id) pairs leading to `person` by
+        following the search tree in `parents`.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, previous = parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = previous
+        path.reverse()
+        return path
+
+    def joined_path(self, source_parents, target_parents, meeting):
+        """
+        Returns the path through `meeting` formed by the search trees
+        grown from the source and from the target.
+        """
+        path = self.path(source_parents, meeting)
+        person = meeting
+        while target_parents[person] is not None:
+            movie, following = target_parents[person]
+            path.append((self.movie_ids[movie], self.person_ids[following]))
+            person = following
+        return path
+
+
+class Extended():
+    """
+    Sequence over a read-only table that can be appended to and written,
+    keeping the changes beside the table.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.changes = {}
+        self.tail = []
+
+    def __len__(self):
+        return len(self.base) + len(self.tail)
+
+    def __getitem__(self, i):
+        if i in self.changes:
+            return self.changes[i]
+        if i < len(self.base):
+            return self.base[i]
+        return self.tail[i - len(self.base)]
+
+    def __setitem__(self, i, value):
+        if i < len(self.base):
+            self.changes[i] = value
+        else:
+            self.tail[i - len(self.base)] = value
+
+    def append(self, value):
+        self.tail.append(value)
+
+
+def csr(size, pairs):
+    """
+    Returns `(offsets, neighbors)` arrays for `(i, j)` pairs over
+    indexes `0 <= i < size`, with each row's neighbors in ascending order.
+    """
+    pairs = sorted(pairs)
+    offsets = array("q", bytes(8 * (size + 1)))
+    neighbors = array("i", (j for _, j in pairs))
+    for i, _ in pairs:
+        offsets[i + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    return offsets, neighbors
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files straight into a `Graph`.
+    """
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        people = [(row["id"], row["name"], row["birth"])
+                  for row in csv.DictReader(f)]
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        movies = [(row["id"], row["title"], row["year"])
+                  for row in csv.DictReader(f)]
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        stars = [(row["person_id"], row["movie_id"])
+                 for row in csv.DictReader(f)]
+    return Graph.build(people, movies, stars)
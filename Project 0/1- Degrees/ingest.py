@@ -0,0 +1,145 @@
+"""
+Loading of stars.csv into the `degrees` dictionaries, in parallel when
+asked for.
+
+The file is split into byte ranges that start and end on line
+boundaries, and each range is parsed by a forked worker process. Workers
+check rows against the people and movies already loaded, then return
+their part of the adjacency: the movies of each person and the stars of
+each movie they saw. Those parts are merged into the `movies` and
+`stars` sets, so the result is the same as adding the rows one by one.
+
+stars.csv only holds ids, so no quoted field can span a line break and
+every line boundary is a row boundary.
+"""
+
+import csv
+import io
+import os
+import time
+
+from forks import fork_map, forkable
+
+# Files smaller than this are parsed in one process
+MIN_PARALLEL_BYTES = 1 << 20
+
+# Byte ranges handed out per worker, so uneven ranges balance out
+CHUNKS_PER_WORKER = 4
+
+
+def load_stars(path, people, movies, workers=1, stats=None):
+    """
+    Adds the rows of the stars CSV at `path` to the `people` and `movies`
+    dictionaries, skipping rows naming an unknown person or movie.
+
+    The file is parsed in this process unless `workers` is more than 1,
+    or None for all CPUs, and it is at least MIN_PARALLEL_BYTES long.
+
+    If `stats` is a dictionary, the rows read, rows skipped, seconds
+    taken, rows per second and workers used are recorded in it.
+    """
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        first = f.tell()
+        size = os.fstat(f.fileno()).st_size
+    columns = (header.index("person_id"), header.index("movie_id"))
+
+    if workers <= 1 or size - first < MIN_PARALLEL_BYTES or not forkable():
+        workers = 1
+        ranges = [(first, size)]
+    else:
+        ranges = line_ranges(path, first, size, workers * CHUNKS_PER_WORKER)
+    tasks = [(path, begin, end, columns) for begin, end in ranges]
+
+    parts = fork_map(parse_range, (people, movies), tasks, workers,
+                     ordered=False)
+    rows, skipped = merge(parts, people, movies)
+
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats["rows"] = rows
+        stats["skipped"] = skipped
+        stats["seconds"] = seconds
+        stats["rows_per_second"] = rows / seconds if seconds else 0.0
+        stats["workers"] = workers
+
+
+def line_ranges(path, first, size, count):
+    """
+    Splits bytes `first` to `size` of the file at `path` into at most
+    `count` (begin, end) ranges, each ending just after a newline or at
+    the end of the file.
+    """
+    ranges = []
+    span = max(1, (size - first) // count)
+    begin = first
+    with open(path, "rb") as f:
+        while begin < size:
+            f.seek(min(size, begin + span))
+            f.readline()
+            end = min(size, f.tell())
+            ranges.append((begin, end))
+            begin = end
+    return ranges
+
+
+def parse_range(known, task):
+    """
+    Parses one (path, begin, end, columns) byte range of a stars CSV,
+    given the (people, movies) already loaded.
+
+    Returns the movies of each person and the stars of each movie found
+    in the range, with the number of rows read and skipped.
+    """
+    known_people, known_movies = known
+    path, begin, end, (person_column, movie_column) = task
+    with open(path, "rb") as f:
+        f.seek(begin)
+        data = f.read(end - begin)
+
+    person_movies = {}
+    movie_stars = {}
+    rows = skipped = 0
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+        # Blank lines are not rows, as with csv.DictReader
+        if not row:
+            continue
+        rows += 1
+        try:
+            person_id = row[person_column]
+            movie_id = row[movie_column]
+        except IndexError:
+            skipped += 1
+            continue
+        if person_id not in known_people or movie_id not in known_movies:
+            skipped += 1
+            continue
+        if person_id in person_movies:
+            person_movies[person_id].append(movie_id)
+        else:
+            person_movies[person_id] = [movie_id]
+        if movie_id in movie_stars:
+            movie_stars[movie_id].append(person_id)
+        else:
+            movie_stars[movie_id] = [person_id]
+    return person_movies, movie_stars, rows, skipped
+
+
+def merge(parts, people, movies):
+    """
+    Adds each parsed range's adjacency to `people` and `movies`, and
+    returns the total rows read and skipped.
+    """
+    rows = skipped = 0
+    for person_movies, movie_stars, part_rows, part_skipped in parts:
+        for person_id, movie_ids in person_movies.items():
+            people[person_id]["movies"].update(movie_ids)
+        for movie_id, person_ids in movie_stars.items():
+            movies[movie_id]["stars"].update(person_ids)
+        rows += part_rows
+        skipped += part_skipped
+    return rows, skipped
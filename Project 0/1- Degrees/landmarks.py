@@ -0,0 +1,283 @@
+"""
+Landmark distance index for the compact degrees graph.
+
+A few well-connected people are picked as landmarks and their distance to
+every person is stored, one byte per landmark per person. By the triangle
+inequality, for any landmark L:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which bounds the separation of any pair instantly. When the bounds meet,
+the path through the landmark is a shortest path and is read straight off
+the index; otherwise they prune the bidirectional search.
+"""
+
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from snapshot import load_cached_graph, source_stamps
+from sweep import UNREACHABLE, sweep
+
+MAGIC = b"DEGLMK01"
+
+# Stored distance of people a landmark cannot reach; larger distances
+# are clamped just below it
+FAR = 255
+
+# (mtime_ns, size) of each source CSV, then landmark and people counts
+HEADER = struct.Struct("<8s" + "qq" * 3 + "qq")
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances):
+        """
+        Create an index over `graph`.
+            - `landmarks`: person indexes of the landmarks
+            - `distances`: for each person index in turn, one byte per
+              landmark with its distance, or FAR if unreachable
+        """
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        self.version = graph.version
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        LandmarkIndex.build(graph, count) sweeps from the `count` people
+        with the most co-star slots across their movies.
+        """
+        def costars(person):
+            return sum(len(graph.stars_of(movie))
+                       for movie in graph.movies_of(person))
+
+        people = len(graph.person_ids)
+        landmarks = sorted(range(people), key=costars, reverse=True)[:count]
+        landmarks = array("i", landmarks)
+
+        distances = array("B", bytes(people * len(landmarks)))
+        for i, landmark in enumerate(landmarks):
+            column = sweep(graph, graph.person_ids[landmark])
+            distances[i::len(landmarks)] = array("B", (
+                FAR if d == UNREACHABLE else min(d, FAR - 1) for d in column
+            ))
+        return cls(graph, landmarks, distances)
+
+    def row(self, person):
+        """
+        Returns the landmark distances of person index `person`.
+        """
+        count = len(self.landmarks)
+        return self.distances[person * count:(person + 1) * count]
+
+    def bounds(self, source, target):
+        """
+        Returns `(lower, upper)` bounds on the degrees of separation
+        between two person ids. `lower` is math.inf if some landmark
+        proves they are not connected; `upper` is math.inf if no landmark
+        reaches both.
+
+        Once rows have been added to the graph the stored distances may be
+        too long, so the index only returns the trivial bounds (0, inf)
+        until it is rebuilt.
+        """
+        return self.index_bounds(self.graph.person_index(source),
+                                 self.graph.person_index(target))
+
+    def index_bounds(self, source, target):
+        """
+        Returns the bounds of `bounds` for two person indexes.
+        """
+        if self.version != self.graph.version:
+            return 0, math.inf
+        if source == target:
+            return 0, 0
+        lower, upper = 0, math.inf
+        for s, t in zip(self.row(source), self.row(target)):
+            if (s == FAR) != (t == FAR):
+                return math.inf, math.inf
+            if s != FAR:
+                lower = max(lower, abs(s - t))
+                upper = min(upper, s + t)
+        return lower, upper
+
+    def lower_bound(self, person, row):
+        """
+        Returns a lower bound on the distance from person index `person`
+        to the person whose landmark distances are `row`, or math.inf if
+        a landmark proves they are not connected.
+        """
+        bound = 0
+        for p, t in zip(self.row(person), row):
+            if (p == FAR) != (t == FAR):
+                return math.inf
+            if p != FAR and abs(p - t) > bound:
+                bound = abs(p - t)
+        return bound
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, like `Graph.shortest_path`.
+
+        If `stats` is a dict, it is filled as by
+        `Graph.bidirectional_shortest_path`, with "explored" counting the
+        people walked instead when the path comes from the index.
+        """
+        graph = self.graph
+        s = graph.person_index(source)
+        t = graph.person_index(target)
+        lower, upper = self.index_bounds(s, t)
+        if lower == math.inf:
+            if stats is not None:
+                stats["explored"] = 0
+            return None
+
+        # Exact bounds: walk down to and back up from a tight landmark
+        source_row, target_row = self.row(s), self.row(t)
+        if lower == upper:
+            for slot in range(len(self.landmarks)):
+                if source_row[slot] + target_row[slot] == upper:
+                    path = self.landmark_path(slot, s, t)
+                    if stats is not None:
+                        stats["explored"] = len(path)
+                    return path
+
+        # Otherwise skip people who cannot be on a path of length `upper`
+        if upper == math.inf:
+            return graph.bidirectional_shortest_path(source, target, stats)
+
+        def prune(person, depth, from_source):
+            row = target_row if from_source else source_row
+            return depth + self.lower_bound(person, row) > upper
+
+        return graph.bidirectional_shortest_path(source, target, stats, prune)
+
+    def landmark_path(self, slot, source, target):
+        """
+        Returns a path from person index `source` to `target` through
+        the landmark in `slot`, made of steps that each move one degree
+        closer to or further from the landmark.
+        """
+        graph = self.graph
+        count = len(self.landmarks)
+
+        def descend(person):
+            """
+            Returns (movie, person) steps from `person` to the landmark.
+            """
+            steps = []
+            distance = self.distances[person * count + slot]
+            while distance > 0:
+                step = None
+                for movie in graph.movies_of(person):
+                    for neighbor in graph.stars_of(movie):
+                        if (self.distances[neighbor * count + slot]
+                                == distance - 1):
+                            step = (movie, neighbor)
+                            break
+                    if step is not None:
+                        break
+                steps.append(step)
+                person = step[1]
+                distance -= 1
+            return steps
+
+        path = [(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in descend(source)]
+
+        # Reverse the target's walk so it leads away from the landmark
+        steps = descend(target)
+        people = [target] + [person for _, person in steps]
+        for i in reversed(range(len(steps))):
+            path.append((graph.movie_ids[steps[i][0]],
+                         graph.person_ids[people[i]]))
+        return path
+
+    def save(self, path, stamps):
+        """
+        Writes the index to `path`, recording the source `stamps` of the
+        graph it was built from.
+        """
+        header = HEADER.pack(MAGIC, *[v for stamp in stamps for v in stamp],
+                             len(self.landmarks), len(self.graph.person_ids))
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(header)
+            f.write(bytes(self.landmarks))
+            f.write(bytes(self.distances))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, graph, path, stamps=None):
+        """
+        LandmarkIndex.load(graph, path, stamps) memory-maps the index at
+        `path`. Returns None if it is missing or was built from other
+        source files or another graph.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(data) < HEADER.size:
+            return None
+
+        magic, *values, count, people = HEADER.unpack_from(data)
+        if magic != MAGIC or people != len(graph.person_ids):
+            return None
+        if stamps is not None and values != [v for s in stamps for v in s]:
+            return None
+        if len(data) != HEADER.size + 4 * count + people * count:
+            return None
+
+        view = memoryview(data)
+        start = HEADER.size + 4 * count
+        landmarks = view[HEADER.size:start].cast("i")
+        return cls(graph, landmarks, view[start:])
+
+
+def index_path(directory):
+    """
+    Returns where the landmark index for `directory` is stored.
+    """
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def load_index(directory, graph=None):
+    """
+    Returns the current landmark index for `directory`, or None if it
+    has not been built since the CSVs last changed.
+    """
+    if graph is None:
+        graph = load_cached_graph(directory)
+    return LandmarkIndex.load(graph, index_path(directory),
+                              source_stamps(directory))
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    graph = load_cached_graph(directory)
+    start = time.perf_counter()
+    index = LandmarkIndex.build(graph, count)
+    seconds = time.perf_counter() - start
+
+    path = index_path(directory)
+    index.save(path, source_stamps(directory))
+    print(f"Built {len(index.landmarks)} landmarks over "
+          f"{len(graph.person_ids)} people in {seconds:.2f} s")
+    print(f"Index size: {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
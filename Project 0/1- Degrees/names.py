@@ -0,0 +1,206 @@
+"""
+Name index for resolving people by exact name, prefix, or approximate
+spelling.
+
+Names are kept in lowercase sorted order for exact and prefix lookups by
+binary search, and each name's character trigrams are indexed so that
+misspelled names can be matched by the trigrams they share.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left, insort
+
+# Most trigram postings scanned for one fuzzy lookup; the rarest
+# trigrams are scanned first, since they narrow the candidates most
+MAX_POSTINGS = 4000
+
+# Candidates rescored exactly for each result wanted
+RESCORE_FACTOR = 5
+
+# Least trigram similarity for a fuzzy match to be returned
+MIN_SCORE = 0.3
+
+
+class NameIndex():
+
+    def __init__(self):
+        """
+        Create an empty index. Each name added becomes an entry number,
+        and entries are never renumbered.
+        """
+        self.entry_ids = []
+        self.entry_names = []
+        self.entry_keys = []
+        self.removed = set()
+        # Live entry numbers in order of their lowercase names
+        self.order = []
+        # Maps each trigram to the entry numbers of names containing it
+        self.grams = {}
+
+    @classmethod
+    def build(cls, people):
+        """
+        NameIndex.build(people) indexes `(person_id, name)` pairs.
+        """
+        index = cls()
+        grams = {}
+        for entry, (person_id, name) in enumerate(people):
+            index.entry_ids.append(person_id)
+            index.entry_names.append(name)
+            index.entry_keys.append(name.lower())
+            for gram in trigrams(name):
+                if gram in grams:
+                    grams[gram].append(entry)
+                else:
+                    grams[gram] = [entry]
+        index.grams = {gram: array("i", entries)
+                       for gram, entries in grams.items()}
+        keys = index.entry_keys
+        index.order = sorted(range(len(keys)), key=keys.__getitem__)
+        return index
+
+    @classmethod
+    def from_people(cls, people):
+        """
+        NameIndex.from_people(people) indexes the `degrees.people`
+        dictionary.
+        """
+        return cls.build(
+            (person_id, person["name"]) for person_id, person in people.items()
+        )
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        NameIndex.from_graph(graph) indexes every person in a `Graph`.
+        """
+        return cls.build(
+            (graph.person_ids[i], graph.person_names[i])
+            for i in range(len(graph.person_ids))
+        )
+
+    def add(self, person_id, name):
+        """
+        Adds one person's name to the index.
+        """
+        entry = len(self.entry_ids)
+        self.entry_ids.append(person_id)
+        self.entry_names.append(name)
+        self.entry_keys.append(name.lower())
+        insort(self.order, entry, key=self.entry_keys.__getitem__)
+        for gram in trigrams(name):
+            self.grams.setdefault(gram, array("i")).append(entry)
+
+    def remove(self, person_id, name):
+        """
+        Removes a person's name from the index, if present.
+        """
+        key = name.lower()
+        keys = self.entry_keys
+        i = bisect_left(self.order, key, key=keys.__getitem__)
+        while i < len(self.order) and keys[self.order[i]] == key:
+            entry = self.order[i]
+            if self.entry_ids[entry] == person_id:
+                self.removed.add(entry)
+                del self.order[i]
+                return
+            i += 1
+
+    def find(self, key, prefix=False):
+        """
+        Yields live entries whose lowercase name equals, or with `prefix`
+        starts with, `key`, in name order.
+        """
+        keys = self.entry_keys
+        i = bisect_left(self.order, key, key=keys.__getitem__)
+        while i < len(self.order):
+            entry = self.order[i]
+            if keys[entry] != key and not (
+                prefix and keys[entry].startswith(key)
+            ):
+                return
+            yield entry
+            i += 1
+
+    def exact(self, name):
+        """
+        Returns the ids of people named `name`, ignoring case.
+        """
+        return [self.entry_ids[entry] for entry in self.find(name.lower())]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (person_id, name) pairs of names starting
+        with `prefix`, ignoring case, in name order.
+        """
+        matches = []
+        for entry in self.find(prefix.lower(), prefix=True):
+            if len(matches) == limit:
+                break
+            matches.append((self.entry_ids[entry], self.entry_names[entry]))
+        return matches
+
+    def fuzzy(self, name, limit=10):
+        """
+        Returns up to `limit` (person_id, name, score) triples of the names
+        sharing the most trigrams with `name`, best first, where score is
+        the Dice similarity of the two names' trigram sets and at least
+        MIN_SCORE.
+        """
+        grams = trigrams(name)
+        postings = sorted(
+            (self.grams[gram] for gram in grams if gram in self.grams),
+            key=len
+        )
+
+        # Count shared trigrams, rarest first, within the scan budget
+        counts = {}
+        scanned = 0
+        for posting in postings:
+            if counts and scanned + len(posting) > MAX_POSTINGS:
+                break
+            for entry in posting:
+                counts[entry] = counts.get(entry, 0) + 1
+            scanned += len(posting)
+
+        # Rescore the best candidates against all of their trigrams
+        candidates = heapq.nlargest(limit * RESCORE_FACTOR, counts,
+                                    key=counts.__getitem__)
+        scored = []
+        for entry in candidates:
+            if entry in self.removed:
+                continue
+            other = trigrams(self.entry_names[entry])
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            if score < MIN_SCORE:
+                continue
+            scored.append((score, self.entry_keys[entry], entry))
+        scored.sort(key=lambda match: (-match[0], match[1]))
+        return [(self.entry_ids[entry], self.entry_names[entry], score)
+                for score, _, entry in scored[:limit]]
+
+    def lookup(self, name, limit=10):
+        """
+        Returns up to `limit` ranked (person_id, name, score) candidates:
+        exact matches if there are any, else names starting with `name`,
+        else the closest spellings.
+        """
+        matches = [(self.entry_ids[entry], self.entry_names[entry], 1.0)
+                   for entry in self.find(name.lower())]
+        if matches:
+            return matches[:limit]
+        matches = [(person_id, match, len(name) / len(match))
+                   for person_id, match in self.prefix(name, limit)]
+        if matches:
+            return sorted(matches, key=lambda match: -match[2])
+        return self.fuzzy(name, limit)
+
+
+def trigrams(name):
+    """
+    Returns the set of three-character substrings of a padded, lowercase
+    name, so that word starts and ends count as well.
+    """
+    padded = f"  {' '.join(name.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,177 @@
+"""
+Binary snapshots of a `Graph`, so later runs can skip parsing the CSVs.
+
+A snapshot is a header followed by 8-byte aligned sections holding the
+graph's arrays in native byte order. Loading memory-maps the file and
+wraps each section in a `memoryview`, so nothing is rebuilt row by row.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, load_graph
+
+MAGIC = b"DEGSNAP1"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Byte order, then (mtime_ns, size) of each source CSV
+HEADER = struct.Struct("<8sc" + "qq" * len(SOURCES))
+
+# Graph attributes stored as string tables, then as integer arrays
+STRING_FIELDS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+]
+ARRAY_FIELDS = [
+    ("movie_offsets", "q"), ("person_movies", "i"),
+    ("star_offsets", "q"), ("movie_stars", "i"),
+    ("name_order", "i"),
+]
+SECTIONS = 2 * len(STRING_FIELDS) + len(ARRAY_FIELDS)
+
+# (offset, length) in bytes of every section
+TABLE = struct.Struct("<" + "qq" * SECTIONS)
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob, where string
+    `i` is `blob[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    @classmethod
+    def encode(cls, strings):
+        """
+        StringTable.encode(strings) returns the `(offsets, blob)` bytes
+        for a sequence of strings.
+        """
+        offsets = array("q", [0])
+        blob = bytearray()
+        for string in strings:
+            blob += string.encode("utf-8")
+            offsets.append(len(blob))
+        return offsets.tobytes(), bytes(blob)
+
+
+def source_stamps(directory):
+    """
+    Returns the (mtime_ns, size) of each source CSV in `directory`.
+    """
+    stamps = []
+    for source in SOURCES:
+        stat = os.stat(os.path.join(directory, source))
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def save_snapshot(graph, path, stamps):
+    """
+    Writes `graph` to `path`, recording the source `stamps` it was built
+    from. The file is replaced atomically.
+    """
+    if graph.version:
+        graph = graph.compact()
+    sections = []
+    for field in STRING_FIELDS:
+        sections.extend(StringTable.encode(getattr(graph, field)))
+    for field, _ in ARRAY_FIELDS:
+        sections.append(bytes(getattr(graph, field)))
+
+    byteorder = b"<" if sys.byteorder == "little" else b">"
+    header = HEADER.pack(MAGIC, byteorder,
+                         *[value for stamp in stamps for value in stamp])
+
+    # Lay sections out after the header and table on 8-byte boundaries
+    table = []
+    offset = align(HEADER.size + TABLE.size)
+    for section in sections:
+        table.extend([offset, len(section)])
+        offset = align(offset + len(section))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(TABLE.pack(*table))
+        for section, start in zip(sections, table[::2]):
+            f.write(bytes(start - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def load_snapshot(path, stamps=None):
+    """
+    Memory-maps the snapshot at `path` and returns its `Graph`.
+
+    Returns None if the file is missing, unreadable, or was built from
+    source files other than `stamps`.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) < HEADER.size + TABLE.size:
+        return None
+
+    magic, byteorder, *values = HEADER.unpack_from(data)
+    native = b"<" if sys.byteorder == "little" else b">"
+    if magic != MAGIC or byteorder != native:
+        return None
+    if stamps is not None and values != [v for s in stamps for v in s]:
+        return None
+
+    table = TABLE.unpack_from(data, HEADER.size)
+    view = memoryview(data)
+    sections = [view[offset:offset + length]
+                for offset, length in zip(table[::2], table[1::2])]
+
+    fields = {}
+    for i, field in enumerate(STRING_FIELDS):
+        offsets, blob = sections[2 * i], sections[2 * i + 1]
+        fields[field] = StringTable(offsets.cast("q"), blob)
+    for i, (field, typecode) in enumerate(ARRAY_FIELDS):
+        fields[field] = sections[2 * len(STRING_FIELDS) + i].cast(typecode)
+    return Graph(**fields)
+
+
+def load_cached_graph(directory, path=None):
+    """
+    Returns the `Graph` for the CSVs in `directory`, from its snapshot if
+    that is still current, else by parsing the CSVs and writing a new
+    snapshot for next time.
+    """
+    if path is None:
+        path = os.path.join(directory, "degrees.snapshot")
+    stamps = source_stamps(directory)
+    graph = load_snapshot(path, stamps)
+    if graph is None:
+        graph = load_graph(directory)
+        try:
+            save_snapshot(graph, path, stamps)
+        except OSError:
+            pass
+    return graph
+
+
+def align(offset):
+    """
+    Rounds `offset` up to a multiple of 8.
+    """
+    return (offset + 7) // 8 * 8
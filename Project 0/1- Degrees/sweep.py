@@ -0,0 +1,183 @@
+"""
+Distances from one person to everyone reachable, in a single sweep.
+
+The sweep is a breadth-first search over the `Graph` adjacency that
+expands a whole level at a time: all movies of the current people, then
+all stars of those movies. With NumPy installed each level is a handful
+of array operations; without it the same levels are expanded in Python.
+"""
+
+import sys
+from array import array
+
+from snapshot import load_cached_graph
+
+# Distance of people the source cannot reach
+UNREACHABLE = -1
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python sweep.py directory person [output]")
+    directory = sys.argv[1]
+    person = sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) == 4 else None
+
+    graph = load_cached_graph(directory)
+    source = person if graph.person_index(person) is not None else None
+    if source is None:
+        person_ids = graph.person_ids_for_name(person)
+        if len(person_ids) != 1:
+            sys.exit("Person not found." if not person_ids
+                     else f"Ambiguous name: {', '.join(person_ids)}")
+        source = person_ids[0]
+
+    distances = sweep(graph, source)
+    counts, unreachable = histogram(distances)
+    for degrees, people in enumerate(counts):
+        print(f"{degrees} degrees: {people}")
+    print(f"Unreachable: {unreachable}")
+
+    if output:
+        write_distances(distances, f"{output}.distances")
+        write_histogram(counts, f"{output}.histogram.csv")
+
+
+def sweep(graph, source):
+    """
+    Returns an array with the degrees of separation between `source` and
+    every person index in `graph`, or UNREACHABLE.
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    # Rows added since the tables were built live outside the arrays
+    if numpy is None or graph.version:
+        return sweep_python(graph, graph.person_index(source))
+    return sweep_numpy(graph, graph.person_index(source), numpy)
+
+
+def sweep_python(graph, source):
+    """
+    Level-by-level sweep in plain Python.
+    """
+    distances = array("i", [UNREACHABLE]) * len(graph.person_ids)
+    movies_seen = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    level = [source]
+    degrees = 0
+
+    while level:
+        degrees += 1
+        next_level = []
+        for person in level:
+            for movie in graph.movies_of(person):
+                if movies_seen[movie]:
+                    continue
+                movies_seen[movie] = 1
+                for neighbor in graph.stars_of(movie):
+                    if distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = degrees
+                        next_level.append(neighbor)
+        level = next_level
+
+    return distances
+
+
+def sweep_numpy(graph, source, np):
+    """
+    Level-by-level sweep with each level expanded by NumPy gathers.
+    """
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.int64)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.int32)
+    star_offsets = np.frombuffer(graph.star_offsets, dtype=np.int64)
+    movie_stars = np.frombuffer(graph.movie_stars, dtype=np.int32)
+
+    distances = np.full(len(graph.person_ids), UNREACHABLE, dtype=np.int32)
+    movies_seen = np.zeros(len(graph.movie_ids), dtype=bool)
+    distances[source] = 0
+    level = np.array([source], dtype=np.int32)
+    degrees = 0
+
+    while level.size:
+        degrees += 1
+
+        # Movies of this level not expanded before
+        movies = np.unique(gather(np, movie_offsets, person_movies, level))
+        movies = movies[~movies_seen[movies]]
+        movies_seen[movies] = True
+
+        # Their stars not reached before form the next level
+        stars = np.unique(gather(np, star_offsets, movie_stars, movies))
+        level = stars[distances[stars] == UNREACHABLE]
+        distances[level] = degrees
+
+    return array("i", distances.tobytes())
+
+
+def gather(np, offsets, neighbors, rows):
+    """
+    Returns the concatenated CSR neighbor lists of every index in `rows`.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return neighbors[:0]
+
+    # Position k of row r is starts[r] + (k - first output slot of r)
+    firsts = np.cumsum(counts) - counts
+    index = np.repeat(starts - firsts, counts) + np.arange(total)
+    return neighbors[index]
+
+
+def histogram(distances):
+    """
+    Returns a list whose item `d` counts the people `d` degrees away, and
+    the number of people who are unreachable.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is not None:
+        distances = np.frombuffer(distances, dtype=np.int32)
+        reachable = distances[distances != UNREACHABLE]
+        counts = np.bincount(reachable).tolist()
+        return counts, len(distances) - len(reachable)
+
+    counts = []
+    unreachable = 0
+    for distance in distances:
+        if distance == UNREACHABLE:
+            unreachable += 1
+            continue
+        while len(counts) <= distance:
+            counts.append(0)
+        counts[distance] += 1
+    return counts, unreachable
+
+
+def write_distances(distances, path):
+    """
+    Writes distances as raw native int32 values in person index order.
+    """
+    with open(path, "wb") as f:
+        f.write(distances.tobytes())
+
+
+def write_histogram(counts, path):
+    """
+    Writes the histogram as CSV rows of degrees and people.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("degrees,people\n")
+        for degrees, people in enumerate(counts):
+            f.write(f"{degrees},{people}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Checks that a `Graph` reloaded after updates were appended to its CSVs
+agrees with the dictionaries `degrees.load_data` builds from them.
+
+Run with `python -m unittest test_graph` (or pytest) from this directory.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import degrees
+from graph import load_graph
+from snapshot import SOURCES, load_cached_graph
+from updates import Watcher
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+class RestartAfterUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for source in SOURCES:
+            shutil.copy(os.path.join(DATA, source), self.directory)
+
+        # Apply an update to a person and a movie while running
+        graph = load_cached_graph(self.directory)
+        watcher = Watcher(self.directory, graph)
+        with open(os.path.join(self.directory, "people.csv"), "a",
+                  encoding="utf-8") as f:
+            f.write('158,"Thomas Hanks",1956\n')
+        with open(os.path.join(self.directory, "movies.csv"), "a",
+                  encoding="utf-8") as f:
+            f.write('109830,"Forrest Gump (Director\'s Cut)",1994\n')
+        watcher.poll()
+        self.running = graph
+
+        degrees.names.clear()
+        degrees.people.clear()
+        degrees.movies.clear()
+        degrees.load_data(self.directory, workers=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_restart_matches_dict_loader(self):
+        # Restart from the CSVs, parsed and from a rebuilt snapshot
+        for graph in [self.running, load_graph(self.directory),
+                      load_cached_graph(self.directory)]:
+            self.assertEqual(len(graph.person_ids), len(degrees.people))
+            self.assertEqual(len(graph.movie_ids), len(degrees.movies))
+            for person_id, person in degrees.people.items():
+                self.assertEqual(graph.person(person_id)["name"],
+                                 person["name"])
+                self.assertEqual(graph.neighbors_for_person(person_id),
+                                 degrees.neighbors_for_person(person_id))
+            for movie_id, movie in degrees.movies.items():
+                self.assertEqual(graph.movie(movie_id)["title"],
+                                 movie["title"])
+
+            for source in degrees.people:
+                for target in degrees.people:
+                    expected = degrees.shortest_path(source, target)
+                    path = graph.shortest_path(source, target)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertEqual(len(path), len(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
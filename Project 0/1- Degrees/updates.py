@@ -0,0 +1,110 @@
+"""
+Applies new people, movies and stars to already loaded data.
+
+Updates go to any target with `add_people`, `add_movies` and `add_stars`
+taking CSV rows as dictionaries: the `degrees` module itself for its
+`names`/`people`/`movies` dictionaries, or a `Graph`. Rows can come from
+delta CSVs in the usual schema, or from bytes appended to the loaded CSVs.
+
+A `Graph` counts the updates applied to it in `version`, and indexes
+built over it (such as `landmarks.LandmarkIndex`) stop trusting their
+stored data once the version changes.
+"""
+
+import csv
+import io
+import os
+
+from snapshot import SOURCES
+
+
+class Tail():
+    """
+    Follows a CSV file that is only ever appended to.
+    """
+
+    def __init__(self, path, offset=None):
+        """
+        Start following `path` from byte `offset`, or from its current
+        end if no offset is given.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.header = f.readline().decode("utf-8").strip("\r\n")
+        self.offset = os.path.getsize(path) if offset is None else offset
+
+    def read(self):
+        """
+        Returns the rows of every complete line appended since the last
+        read, as dictionaries keyed by the header's columns.
+        """
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            raise Exception(f"{self.path} was truncated")
+        if size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+
+        # Leave a partly written last line for the next read
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        text = data[:end].decode("utf-8")
+        fieldnames = next(csv.reader([self.header]))
+        return list(csv.DictReader(io.StringIO(text), fieldnames=fieldnames))
+
+
+class Watcher():
+    """
+    Applies rows appended to a data directory's CSVs to a target.
+    """
+
+    def __init__(self, directory, target):
+        """
+        Start watching the CSVs in `directory` from their current ends.
+        Create the watcher right after loading, so no rows are missed.
+        """
+        self.target = target
+        self.tails = [Tail(os.path.join(directory, source))
+                      for source in SOURCES]
+
+    def poll(self):
+        """
+        Applies any appended rows and returns how many of people, movies
+        and stars were read.
+        """
+        people, movies, stars = [tail.read() for tail in self.tails]
+        apply_rows(self.target, people, movies, stars)
+        return len(people), len(movies), len(stars)
+
+
+def apply_rows(target, people=(), movies=(), stars=()):
+    """
+    Applies rows to `target`, people and movies first so that new stars
+    can refer to them.
+    """
+    if people:
+        target.add_people(people)
+    if movies:
+        target.add_movies(movies)
+    if stars:
+        target.add_stars(stars)
+
+
+def load_delta(directory, target):
+    """
+    Applies every delta CSV present in `directory` to `target`, and
+    returns how many of people, movies and stars were read.
+    """
+    tables = []
+    for source in SOURCES:
+        path = os.path.join(directory, source)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                tables.append(list(csv.DictReader(f)))
+        else:
+            tables.append([])
+    apply_rows(target, *tables)
+    return tuple(len(rows) for rows in tables)
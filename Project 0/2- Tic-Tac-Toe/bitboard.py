@@ -0,0 +1,204 @@
+"""
+Tic Tac Toe board as two bitmasks, one per player
+
+Cell (i, j) is bit 3 * i + j. Moves set or clear one bit, and whether a
+player has won is looked up in a table indexed by their mask, built from
+the masks of the 8 winning lines. `Bitboard.from_board` and `to_board`
+convert to and from the list-of-lists boards used by `tictactoe` and
+`runner.py`.
+"""
+
+import math
+
+from tictactoe import X, O, EMPTY
+
+ROWS = 3
+COLUMNS = 3
+
+# Every cell set
+FULL = (1 << ROWS * COLUMNS) - 1
+
+
+def win_masks(rows, columns, k):
+    """
+    Returns the bitmasks of every line of `k` cells in a row, column or
+    diagonal of a `rows` x `columns` board.
+    """
+    masks = []
+    for i in range(rows):
+        for j in range(columns):
+            for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if not (0 <= end_i < rows and 0 <= end_j < columns):
+                    continue
+                mask = 0
+                for step in range(k):
+                    mask |= 1 << (i + di * step) * columns + j + dj * step
+                masks.append(mask)
+    return masks
+
+
+WIN_MASKS = win_masks(ROWS, COLUMNS, 3)
+
+# Whether each possible mask of one player's cells contains a line
+WINNING = tuple(any(mask & line == line for line in WIN_MASKS)
+                for mask in range(FULL + 1))
+
+
+class Bitboard():
+
+    def __init__(self, x=0, o=0):
+        """
+        Create a board from the masks of X's and O's cells.
+        """
+        self.x = x
+        self.o = o
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Bitboard.from_board(board) converts a list-of-lists board.
+        """
+        x = o = 0
+        for i in range(ROWS):
+            for j in range(COLUMNS):
+                if board[i][j] == X:
+                    x |= 1 << i * COLUMNS + j
+                elif board[i][j] == O:
+                    o |= 1 << i * COLUMNS + j
+        return cls(x, o)
+
+    def to_board(self):
+        """
+        Returns the board as lists of X, O and EMPTY.
+        """
+        return [[X if self.x >> i * COLUMNS + j & 1
+                 else O if self.o >> i * COLUMNS + j & 1
+                 else EMPTY
+                 for j in range(COLUMNS)]
+                for i in range(ROWS)]
+
+    def key(self):
+        """
+        Returns a hashable key for the position.
+        """
+        return self.x, self.o
+
+    def player(self):
+        """
+        Returns the player who has the next turn.
+        """
+        return X if self.x.bit_count() == self.o.bit_count() else O
+
+    def actions(self):
+        """
+        Returns the empty cells as bit numbers.
+        """
+        free = FULL & ~(self.x | self.o)
+        cells = []
+        while free:
+            low = free & -free
+            cells.append(low.bit_length() - 1)
+            free ^= low
+        return cells
+
+    def move(self, cell):
+        """
+        Marks bit `cell` for the player to move.
+        """
+        if self.x.bit_count() == self.o.bit_count():
+            self.x |= 1 << cell
+        else:
+            self.o |= 1 << cell
+
+    def undo(self, cell):
+        """
+        Clears bit `cell`, whichever player marked it.
+        """
+        self.x &= ~(1 << cell)
+        self.o &= ~(1 << cell)
+
+    def winner(self):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        if WINNING[self.x]:
+            return X
+        if WINNING[self.o]:
+            return O
+        return None
+
+    def terminal(self):
+        """
+        Returns True if the game is over, False otherwise.
+        """
+        return self.x | self.o == FULL or WINNING[self.x] or WINNING[self.o]
+
+    def utility(self):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner()
+        return 1 if winner == X else -1 if winner == O else 0
+
+
+def action(cell):
+    """
+    Returns the (i, j) action for bit `cell`.
+    """
+    return divmod(cell, COLUMNS)
+
+
+def cell(action):
+    """
+    Returns the bit number of action (i, j).
+    """
+    return action[0] * COLUMNS + action[1]
+
+
+# Minimax values of positions already searched, keyed by (x, o)
+values = {}
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on a list-of-lists
+    board, searching on a single Bitboard with move and undo.
+    """
+    state = Bitboard.from_board(board)
+    if state.terminal():
+        return None
+
+    maximizing = state.player() == X
+    best, best_move = None, None
+    for move in state.actions():
+        state.move(move)
+        v = value(state)
+        state.undo(move)
+        if best is None or (v > best if maximizing else v < best):
+            best, best_move = v, move
+    return action(best_move)
+
+
+def value(state):
+    """
+    Returns the minimax value of the position.
+    """
+    key = state.key()
+    v = values.get(key)
+    if v is not None:
+        return v
+
+    if state.terminal():
+        v = state.utility()
+    else:
+        maximizing = state.player() == X
+        v = -math.inf if maximizing else math.inf
+        for move in state.actions():
+            state.move(move)
+            child = value(state)
+            state.undo(move)
+            v = max(v, child) if maximizing else min(v, child)
+
+    values[key] = v
+    return v
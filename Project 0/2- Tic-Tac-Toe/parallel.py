@@ -0,0 +1,188 @@
+"""
+Root-parallel search for larger Tic Tac Toe boards
+
+The moves at the root are shared out to a pool of forked processes, and
+each process searches the position after its move with the depth-limited
+alpha-beta search of `tictactoe`. The best value found so far is kept in
+shared memory, so every subtree searched after it starts from that bound,
+as the root of a serial alpha-beta search would.
+
+Run as a script, it times fixed-depth searches of 4x4 positions with 1,
+2, 4 and 8 workers.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import tictactoe as ttt
+
+# Best value found at the root so far, shared with the worker processes,
+# which inherit it on fork
+bound = None
+
+# Best moves found in each position by this process during one call,
+# tried first at the next depth
+best_moves = {}
+
+# Positions timed by the benchmark, as moves played on an empty 4x4 board
+POSITIONS = [
+    [],
+    [(1, 1)],
+    [(1, 1), (1, 2)],
+    [(1, 1), (2, 2), (0, 0)],
+]
+
+
+def main():
+    if len(sys.argv) not in [1, 2, 5]:
+        sys.exit("Usage: python parallel.py [depth [rows columns k]]")
+    depth = int(sys.argv[1]) if len(sys.argv) >= 2 else 6
+    rows, columns, k = ([int(arg) for arg in sys.argv[2:5]]
+                        if len(sys.argv) == 5 else [4, 4, 4])
+
+    print(f"{rows}x{columns} boards, {k} in a row, depth {depth}, "
+          f"{os.cpu_count()} CPUs")
+    print("position                  workers  seconds  speedup   value  move")
+    for moves in POSITIONS:
+        board = ttt.initial_state(rows, columns)
+        for action in moves:
+            board = ttt.result(board, action)
+        serial = None
+        for workers in [1, 2, 4, 8]:
+            # Time the search alone, not starting the processes
+            with Pool(workers) as pool:
+                start = time.perf_counter()
+                value, move = pool.search(board, ttt.ordered_actions(board),
+                                          k, depth, math.inf)
+                seconds = time.perf_counter() - start
+            if serial is None:
+                serial = seconds
+            print(f"{str(moves):<26}{workers:7} {seconds:8.2f} "
+                  f"{serial / seconds:8.2f} {value:7.3f}  {move}")
+
+
+def minimax(board, k=3, budget=ttt.MOVE_BUDGET, workers=None):
+    """
+    Returns the best move found within `budget` seconds by root-parallel
+    searches of increasing depth, using `workers` processes (all CPUs by
+    default). Only depths searched to the end decide the move.
+    """
+    if ttt.terminal(board, k):
+        return None
+    deadline = time.perf_counter() + budget
+    moves = ttt.ordered_actions(board)
+    best = moves[0]
+
+    with Pool(workers) as pool:
+        for depth in range(1, len(moves) + 1):
+            try:
+                value, best = pool.search(board, moves, k, depth, deadline)
+            except ttt.Timeout:
+                break
+
+            # Search the best move first at the next depth
+            moves.remove(best)
+            moves.insert(0, best)
+
+            # A forced win or loss cannot change at greater depths
+            if abs(value) > 1:
+                break
+    return best
+
+
+def search_root(board, k, depth, workers=None):
+    """
+    Returns (value, move) from a root-parallel search `depth` moves deep.
+    """
+    with Pool(workers) as pool:
+        return pool.search(board, ttt.ordered_actions(board), k, depth,
+                           math.inf)
+
+
+class Pool():
+    """
+    Processes searching root moves, or the current process alone when
+    there is one worker or processes cannot be forked.
+    """
+
+    def __init__(self, workers=None):
+        global bound
+        self.workers = os.cpu_count() if workers is None else workers
+        bound = multiprocessing.Value("d", 0.0)
+        best_moves.clear()
+        forkable = "fork" in multiprocessing.get_all_start_methods()
+        if self.workers > 1 and forkable:
+            context = multiprocessing.get_context("fork")
+            self.pool = context.Pool(self.workers)
+        else:
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *details):
+        if self.pool is not None:
+            self.pool.terminate()
+
+    def search(self, board, moves, k, depth, deadline):
+        """
+        Returns (value, move) for the best of `moves` searched `depth`
+        moves deep, or raises Timeout if the deadline passes first.
+        """
+        maximizing = ttt.player(board) == ttt.X
+        bound.value = -math.inf if maximizing else math.inf
+        tasks = [(board, action, k, depth, deadline) for action in moves]
+        if self.pool is None:
+            results = map(search_move, tasks)
+        else:
+            results = self.pool.imap_unordered(search_move, tasks)
+
+        # Only values searched with the full window are exact; the others
+        # are bounds no better than an exact value already found
+        best_value, best_move = None, None
+        for action, value, exact in results:
+            if value is None:
+                raise ttt.Timeout
+            if exact and (best_value is None or (
+                value > best_value if maximizing else value < best_value
+            ) or (value == best_value and
+                  moves.index(action) < moves.index(best_move))):
+                best_value, best_move = value, action
+        return best_value, best_move
+
+
+def search_move(task):
+    """
+    Searches the position after one root move, starting from the shared
+    bound, and returns (action, value, exact), or a value of None if the
+    deadline passed.
+    """
+    board, action, k, depth, deadline = task
+
+    maximizing = ttt.player(board) == ttt.X
+    alpha, beta = -math.inf, math.inf
+    if maximizing:
+        alpha = bound.value
+    else:
+        beta = bound.value
+
+    try:
+        value = ttt.Limited(ttt.result(board, action), k, depth - 1,
+                            alpha, beta, deadline, best_moves, played=1)[0]
+    except ttt.Timeout:
+        return action, None, False
+
+    # Raise the bound for the subtrees searched after this one
+    exact = alpha < value < beta
+    if exact:
+        with bound.get_lock():
+            if (value > bound.value) if maximizing else (value < bound.value):
+                bound.value = value
+    return action, value, exact
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,66 @@
 import pygame
+import random
 import sys
+import threading
 import time
 
 import tictactoe as ttt
 
+# Answer positions from the perfect-play table, if it has been built
+try:
+    positions, table_size, load_time = ttt.load_perfect()
+    print(f"Perfect-play table: {positions} positions, {table_size} bytes, "
+          f"loaded in {load_time * 1000:.2f}ms")
+except OSError:
+    print("No perfect-play table, searching instead "
+          "(build one with: python solve.py build)")
+except ttt.PerfectTableError as error:
+    print(f"{error}, searching instead "
+          "(rebuild it with: python solve.py build)")
+
+# Least seconds the AI seems to think before its move is shown
+AI_DELAY = 0.5
+
+
+class Search():
+    """
+    Computes the AI's move on a background thread, so that the window
+    keeps drawing and handling events while it thinks.
+    """
+
+    def __init__(self, board):
+        self.started = time.monotonic()
+        self.cancelled = threading.Event()
+        self.move = None
+        self.error = None
+        self.done = False
+        self.thread = threading.Thread(target=self.run, args=(board,),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, board):
+        try:
+            self.move = ttt.minimax(board, cancel=self.cancelled)
+        except Exception as error:
+            self.error = error
+        finally:
+            # Even a failed search is over, so the game does not wait on it
+            self.done = True
+
+    def ready(self):
+        """
+        Returns True once the move is found and has been thought about
+        for at least AI_DELAY seconds.
+        """
+        return self.done and time.monotonic() - self.started >= AI_DELAY
+
+    def cancel(self):
+        """
+        Asks the search to stop. Its move, if any, is never used.
+        """
+        self.cancelled.set()
+
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -19,7 +76,7 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+search = None
 
 while True:
 
@@ -102,21 +159,25 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = int(time.monotonic() * 3) % 4
+            title = "Computer thinking" + "." * dots
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searched in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if search is None:
+                search = Search(board)
+            elif search.ready():
+                move = search.move
+                if search.error is not None:
+                    print(f"Search failed ({search.error!r}), "
+                          "playing a random move instead")
+                    move = random.choice(list(ttt.actions(board)))
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,20 +188,23 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Offer a new game at the end, or a reset while playing
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset",
+                                  True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                user = None
+                board = ttt.initial_state()
+                if search is not None:
+                    search.cancel()
+                    search = None
 
     pygame.display.flip()
@@ -0,0 +1,71 @@
+"""
+Plays the AI against itself and prints what each move's search cost.
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def main():
+    args = sys.argv[1:]
+    flags = {arg for arg in args if arg.startswith("--")}
+    args = [arg for arg in args if not arg.startswith("--")]
+    if len(args) not in [0, 3, 4] or not flags <= {
+        "--alpha-beta", "--cold", "--perfect"
+    }:
+        sys.exit("Usage: python selfplay.py [rows columns k [budget]] "
+                 "[--alpha-beta] [--cold] [--perfect]")
+    rows, columns, k = [int(arg) for arg in args[:3]] if args else [3, 3, 3]
+    budget = float(args[3]) if len(args) == 4 else None
+
+    if "--perfect" in flags:
+        positions, size, seconds = ttt.load_perfect()
+        print(f"Perfect-play table: {positions} positions, {size} bytes, "
+              f"loaded in {seconds * 1000:.2f}ms")
+
+    board = ttt.initial_state(rows, columns)
+    totals = ttt.SearchStats()
+    print("move player action    nodes  leaves depth   hits cutoffs      ms")
+    number = 0
+    while not ttt.terminal(board, k):
+        # Searching each move from scratch shows its full cost
+        if "--cold" in flags:
+            ttt.table.clear()
+            ttt.bounds.clear()
+
+        stats = ttt.SearchStats()
+        player = ttt.player(board)
+        action = ttt.minimax(board, alpha_beta="--alpha-beta" in flags,
+                             k=k, budget=budget, stats=stats)
+        board = ttt.result(board, action)
+        number += 1
+        print(f"{number:4} {player:>6} {str(action):>6} {stats.nodes:8} "
+              f"{stats.terminals:7} {stats.max_depth:5} "
+              f"{stats.cache_hits:6} {stats.cutoffs:7} "
+              f"{stats.seconds * 1000:7.1f}")
+        add(totals, stats)
+
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    winner = ttt.winner(board, k)
+    print("Tie." if winner is None else f"{winner} wins.")
+    print(f"Total: {totals.nodes} nodes, {totals.terminals} leaves, "
+          f"{totals.cache_hits} hits, {totals.cutoffs} cutoffs, "
+          f"{totals.seconds * 1000:.1f}ms")
+
+
+def add(totals, stats):
+    """
+    Adds one move's stats to the game's totals.
+    """
+    totals.nodes += stats.nodes
+    totals.terminals += stats.terminals
+    totals.max_depth = max(totals.max_depth, stats.max_depth)
+    totals.seconds += stats.seconds
+    totals.cache_hits += stats.cache_hits
+    totals.cutoffs += stats.cutoffs
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Solves 3x3 Tic Tac Toe once, and writes the perfect-play table that
+`tictactoe.minimax` answers from after `tictactoe.load_perfect`.
+
+The table holds one byte for every base-3 encoding of a board, so a
+lookup is a single index. Only canonical boards of reachable positions
+are filled in, with their value and a best move as a position of the
+canonical key.
+"""
+
+import math
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def main():
+    if len(sys.argv) not in [2, 3] or sys.argv[1] not in ["build", "verify"]:
+        sys.exit("Usage: python solve.py build|verify [table]")
+    command = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) == 3 else ttt.PERFECT_PATH
+
+    if command == "build":
+        start = time.perf_counter()
+        entries = build()
+        write(entries, path)
+        print(f"Solved {len(entries) - entries.count(ttt.UNKNOWN)} "
+              f"positions in {time.perf_counter() - start:.2f}s")
+
+    positions, size, seconds = ttt.load_perfect(path)
+    print(f"Loaded {positions} positions ({size} bytes) from {path} "
+          f"in {seconds * 1000:.2f}ms")
+
+    checked, errors = verify()
+    for error in errors[:10]:
+        print(error)
+    print(f"Verified {checked} positions: {len(errors)} errors")
+    if errors:
+        sys.exit(1)
+
+
+def build():
+    """
+    Returns the table entries of every reachable position, solved by the
+    exhaustive minimax search.
+    """
+    ttt.perfect = None
+    entries = bytearray([ttt.UNKNOWN]) * 3 ** 9
+    frontier = [ttt.initial_state()]
+    while frontier:
+        key = ttt.canonical(frontier.pop())
+        code = int(key.translate(ttt.DIGITS), 3)
+        if entries[code] != ttt.UNKNOWN:
+            continue
+
+        # Solve the canonical board itself, so moves are key positions
+        board = from_key(key)
+        if ttt.terminal(board):
+            entries[code] = (ttt.utility(board) + 1) << 4 | ttt.NO_MOVE
+            continue
+        if ttt.player(board) == ttt.X:
+            value = ttt.Max_Value(board)
+        else:
+            value = ttt.Min_Value(board)
+        i, j = ttt.minimax(board)
+        entries[code] = (value + 1) << 4 | 3 * i + j
+
+        for action in ttt.actions(board):
+            frontier.append(ttt.result(board, action))
+    return entries
+
+
+def write(entries, path):
+    """
+    Writes table entries to `path`.
+    """
+    with open(path, "wb") as f:
+        f.write(ttt.PERFECT_MAGIC)
+        f.write(entries)
+
+
+def verify():
+    """
+    Checks every reachable position, in every orientation, against a
+    live alpha-beta search: the table's value must be the position's
+    value, and the move minimax answers with must keep that value.
+
+    Returns the number of positions checked and a list of errors.
+    """
+    ttt.bounds.clear()
+    checked = 0
+    errors = []
+    seen = set()
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        code = encode(board)
+        if code in seen:
+            continue
+        seen.add(code)
+        checked += 1
+
+        key, _ = ttt.orient(board)
+        entry = ttt.perfect_entry(key)
+        if entry == ttt.UNKNOWN:
+            errors.append(f"{code}: missing from table")
+            continue
+        value = live_value(board)
+        if (entry >> 4) - 1 != value:
+            errors.append(f"{code}: table value {(entry >> 4) - 1}, "
+                          f"search value {value}")
+        if ttt.terminal(board):
+            continue
+
+        move = ttt.minimax(board)
+        if live_value(ttt.result(board, move)) != value:
+            errors.append(f"{code}: move {move} does not keep value {value}")
+
+        for action in ttt.actions(board):
+            frontier.append(ttt.result(board, action))
+    return checked, errors
+
+
+def live_value(board):
+    """
+    Returns the minimax value of the board from a full-window search.
+    """
+    return ttt.Alpha_Beta(board, -math.inf, math.inf)[0]
+
+
+def from_key(key):
+    """
+    Returns the board written as a 9-character key.
+    """
+    return [[ttt.EMPTY if cell == "-" else cell for cell in key[i:i + 3]]
+            for i in range(0, 9, 3)]
+
+
+def encode(board):
+    """
+    Returns the 9-character key of the board as it stands, without
+    choosing a canonical orientation.
+    """
+    return "".join(cell or "-" for row in board for cell in row)
+
+
+if __name__ == "__main__":
+    main()
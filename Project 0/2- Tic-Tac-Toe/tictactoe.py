@@ -3,20 +3,213 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import os
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Seconds the depth-limited search spends on one move by default
+MOVE_BUDGET = 1.0
 
-def initial_state():
+# Value of a win found by the depth-limited search, less one per move
+# played to reach it, so that quicker wins are preferred
+WIN = 1000
+
+
+def symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as the
+    list of cells (i, j) read, in row order, to build the transformed board.
+    """
+    transforms = [
+        lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+        lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i),
+    ]
+    return [[transform(i, j) for i in range(3) for j in range(3)]
+            for transform in transforms]
+
+
+SYMMETRIES = symmetries()
+
+
+def move_order(rows, columns):
+    """
+    Returns every cell of a rows x columns board in search order: by ring
+    around the center, and in each ring corners before edges.
+    """
+    def distance(cell):
+        di = abs(2 * cell[0] - (rows - 1))
+        dj = abs(2 * cell[1] - (columns - 1))
+        return max(di, dj), -(di + dj)
+
+    cells = [(i, j) for i in range(rows) for j in range(columns)]
+    return sorted(cells, key=distance)
+
+
+# Cells tried first by the alpha-beta search: center, corners, then edges
+MOVE_ORDER = move_order(3, 3)
+
+# Search order of the cells of each board shape, keyed by (rows, columns)
+ORDERS = {(3, 3): MOVE_ORDER}
+
+# Lines of k cells on each board shape, built as needed by lines()
+LINES = {}
+
+
+def canonical(board):
+    """
+    Returns a key shared by the board and all of its rotations and
+    reflections: the smallest of their encodings as 9-character strings.
+    """
+    return orient(board)[0]
+
+
+def orient(board):
+    """
+    Returns the canonical key of the board and the index of the symmetry
+    that produces it. Position p of the key is cell SYMMETRIES[s][p].
+    """
+    return min(
+        ("".join(board[i][j] or "-" for i, j in symmetry), s)
+        for s, symmetry in enumerate(SYMMETRIES)
+    )
+
+
+class TranspositionTable():
+    """
+    Minimax values of positions already searched, keyed by canonical
+    board, with counters of lookups that found a value or missed.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the stored value for `key`, or None.
+        """
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, key, value):
+        self.values[key] = value
+
+    def clear(self):
+        """
+        Forgets every stored value and resets the counters.
+        """
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SearchStats():
+    """
+    What one or more searches did, counted when passed to minimax as
+    `stats`: positions visited, leaves evaluated, the deepest position
+    reached in moves below the root, seconds taken, positions answered
+    from a table, and moves left unsearched by alpha-beta cutoffs.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.terminals = 0
+        self.max_depth = 0
+        self.seconds = 0.0
+        self.cache_hits = 0
+        self.cutoffs = 0
+        # Marks on the board of the search being counted
+        self.root = 0
+
+    def visit(self, depth):
+        """
+        Counts a position `depth` moves below the root.
+        """
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+
+# Shared by every call to minimax, so later moves reuse earlier searches
+table = TranspositionTable()
+
+# Alpha-beta results as (lower, upper, best) entries: bounds on the value,
+# and the best move found as a position of the canonical key, or None
+bounds = TranspositionTable()
+
+# Perfect-play table built by solve.py, next to this file by default
+PERFECT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "perfect.table")
+PERFECT_MAGIC = b"TTTPERF1"
+
+# Entry of a position the table does not hold, and the move position of
+# a finished game. Other entries are (value + 1) << 4 | best position.
+UNKNOWN = 0xFF
+NO_MOVE = 0x0F
+
+# Digits of a canonical key read as a base-3 number indexing the table
+DIGITS = str.maketrans("-XO", "012")
+
+# Every entry a table may hold
+PERFECT_ENTRIES = bytes([UNKNOWN] + [
+    (value + 1) << 4 | position
+    for value in [-1, 0, 1] for position in list(range(9)) + [NO_MOVE]
+])
+
+# Table loaded by load_perfect, one entry per base-3 key, or None
+perfect = None
+
+
+class PerfectTableError(Exception):
+    """
+    Raised by load_perfect for a file that is not a perfect-play table of
+    this version, such as a truncated, corrupt or stale one.
+    """
+
+
+def load_perfect(path=PERFECT_PATH):
+    """
+    Loads the perfect-play table at `path` for minimax to answer 3x3
+    positions from, and returns the positions it holds, its size in
+    bytes and the seconds taken to load it.
+    """
+    global perfect
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(PERFECT_MAGIC)] != PERFECT_MAGIC or \
+            len(data) != len(PERFECT_MAGIC) + 3 ** 9:
+        raise PerfectTableError(f"{path} is not a perfect-play table")
+    entries = data[len(PERFECT_MAGIC):]
+    if entries.translate(None, PERFECT_ENTRIES):
+        raise PerfectTableError(f"{path} has corrupt entries")
+    perfect = entries
+    seconds = time.perf_counter() - start
+    return len(perfect) - perfect.count(UNKNOWN), len(data), seconds
+
+
+def perfect_entry(key):
+    """
+    Returns the perfect-play table entry of a canonical key.
+    """
+    return perfect[int(key.translate(DIGITS), 3)]
+
+
+def initial_state(rows=3, columns=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * columns for _ in range(rows)]
 
 
 def player(board):
@@ -67,85 +260,133 @@ def result(board, action):
     if action not in possible_actions:
         raise Exception("Invalid Action!")
     
-    # Create a deep copy of the board to modify it
-    new_board = copy.deepcopy(board)
+    # Copy each row of the board to modify it
+    new_board = [row[:] for row in board]
     new_board[action[0]][action[1]] = player(board)
     
     return new_board
 
 
-def winner(board):
+def marks(board):
     """
-    Returns the winner of the game, if there is one.
+    Returns the number of marks on the board.
     """
-    # Horizontal winning
-    for i in range(len(board)):
-        if board[i][0] == board[i][1] == board[i][2]:
-            if board[i][0] == X:
-                return X
-            elif board[i][0] == O:
-                return O
-            
-    # Vertical winning
-    for j in range(len(board)):
-        if board[0][j] == board[1][j] == board[2][j]:
-            if board[0][j] == X:
-                return X
-            elif board[0][j] == O:
-                return O
-    
-    # Diagonally winning
-    if board[0][0] == board[1][1] == board[2][2]:
-        if board[0][0] == X:
-            return X
-        elif board[0][0] == O:
-            return O
-    elif board[0][2] == board[1][1] == board[2][0]:
-        if board[0][2] == X:
-            return X
-        elif board[0][2] == O:
-            return O
-            
+    return sum(cell is not EMPTY for row in board for cell in row)
+
+
+def lines(rows, columns, k):
+    """
+    Returns every line of `k` cells in a row, column or diagonal of a
+    rows x columns board, as lists of (i, j).
+    """
+    if (rows, columns, k) not in LINES:
+        found = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    line = [(i + di * step, j + dj * step)
+                            for step in range(k)]
+                    end_i, end_j = line[-1]
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        found.append(line)
+        LINES[(rows, columns, k)] = found
+    return LINES[(rows, columns, k)]
+
+
+def winner(board, k=3):
+    """
+    Returns the winner of the game, if there is one: the player with `k`
+    marks in a row, column or diagonal.
+    """
+    for line in lines(len(board), len(board[0]), k):
+        i, j = line[0]
+        first = board[i][j]
+        if first is not EMPTY and all(board[i][j] == first for i, j in line):
+            return first
+
     # If not winning yet return None
     return None
-            
 
-def terminal(board):
+
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
     # Check if there is not possible actions or any player already won
-    if not actions(board) or (winner(board) == X or winner(board) == O):
-        return True  
+    if not actions(board) or winner(board, k) is not None:
+        return True
     # Game is not finished
     return False
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
+    if winner(board, k) == X:
         return 1
-    elif winner(board) == O:
+    elif winner(board, k) == O:
         return -1
     else:
         return 0
 
 
-def minimax(board):
+def minimax(board, alpha_beta=False, k=3, budget=None, cancel=None,
+            stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    With `alpha_beta`, the search prunes moves that cannot change the
+    result and tries the most promising moves first.
+
+    Boards other than 3x3 with three in a row, and any board given a
+    `budget` in seconds, are searched by `deepening` instead, which
+    returns the best move it finds within the budget, or sooner once the
+    `cancel` event (a `threading.Event`) is set.
+
+    If `stats` is a SearchStats, what the search did is added to it.
+    """
+    if stats is None:
+        return choose(board, alpha_beta, k, budget, cancel)
+
+    start = time.perf_counter()
+    stats.root = marks(board)
+    move = choose(board, alpha_beta, k, budget, cancel, stats)
+    stats.seconds += time.perf_counter() - start
+    return move
+
+
+def choose(board, alpha_beta, k, budget, cancel, stats=None):
+    """
+    Returns the action minimax picks, by the search its arguments select.
     """
     # If the game is over return None
-    if terminal(board):
+    if terminal(board, k):
         return None
 
+    if budget is not None or k != 3 or (len(board), len(board[0])) != (3, 3):
+        return deepening(board, k, MOVE_BUDGET if budget is None else budget,
+                         cancel, stats)
+
+    if perfect is not None:
+        key, symmetry = orient(board)
+        entry = perfect_entry(key)
+        if entry != UNKNOWN:
+            if stats is not None:
+                stats.visit(0)
+                stats.cache_hits += 1
+            return SYMMETRIES[symmetry][entry & NO_MOVE]
+
+    if alpha_beta:
+        return Alpha_Beta(board, -math.inf, math.inf, stats)[1]
+
+    if stats is not None:
+        stats.visit(0)
     if player(board) == X:
         v = -math.inf
         best_move = None
         for action in actions(board):
-            max_value = Min_Value(result(board, action))
+            max_value = Min_Value(result(board, action), stats)
             if max_value > v:
                 v = max_value
                 best_move = action
@@ -155,7 +396,7 @@ def minimax(board):
         v = math.inf
         best_move = None
         for action in actions(board):
-            min_value = Max_Value(result(board, action))
+            min_value = Max_Value(result(board, action), stats)
             if min_value < v:
                 v = min_value
                 
@@ -163,22 +404,214 @@ def minimax(board):
         return best_move
 
     
-def Max_Value(board):
+def Max_Value(board, stats=None):
+    if stats is not None:
+        stats.visit(marks(board) - stats.root)
+    key = canonical(board)
+    v = table.get(key)
+    if v is not None:
+        if stats is not None:
+            stats.cache_hits += 1
+        return v
+
     if terminal(board):
-        return utility(board)
-    
-    v = -math.inf    
-    for action in actions(board):
-        v = max(v, Min_Value(result(board, action)))
-        
+        v = utility(board)
+        if stats is not None:
+            stats.terminals += 1
+    else:
+        v = -math.inf
+        for action in actions(board):
+            v = max(v, Min_Value(result(board, action), stats))
+
+    table.store(key, v)
     return v
 
-def Min_Value(board):
+def Min_Value(board, stats=None):
+    if stats is not None:
+        stats.visit(marks(board) - stats.root)
+    key = canonical(board)
+    v = table.get(key)
+    if v is not None:
+        if stats is not None:
+            stats.cache_hits += 1
+        return v
+
     if terminal(board):
-        return utility(board)
-    
-    v = math.inf
-    for action in actions(board):
-        v = min(v, Max_Value(result(board, action)))
-        
-    return v
\ No newline at end of file
+        v = utility(board)
+        if stats is not None:
+            stats.terminals += 1
+    else:
+        v = math.inf
+        for action in actions(board):
+            v = min(v, Max_Value(result(board, action), stats))
+
+    table.store(key, v)
+    return v
+
+
+def Alpha_Beta(board, alpha, beta, stats=None):
+    """
+    Returns (value, move) for the board, searching only moves whose value
+    could fall between alpha and beta. A value at most alpha is an upper
+    bound on the true value, and a value at least beta a lower bound.
+    """
+    if stats is not None:
+        stats.visit(marks(board) - stats.root)
+    key, symmetry = orient(board)
+    lower, upper, best = bounds.get(key) or (-1, 1, None)
+    if best is not None:
+        best = SYMMETRIES[symmetry][best]
+    if lower == upper or lower >= beta or upper <= alpha:
+        if stats is not None:
+            stats.cache_hits += 1
+        return (upper if upper <= alpha else lower), best
+
+    if terminal(board):
+        v = utility(board)
+        if stats is not None:
+            stats.terminals += 1
+        bounds.store(key, (v, v, None))
+        return v, None
+
+    maximizing = player(board) == X
+    v = -math.inf if maximizing else math.inf
+    move = None
+    low, high = alpha, beta
+    for action in ordered_actions(board, best):
+        child = Alpha_Beta(result(board, action), low, high, stats)[0]
+        if (child > v) if maximizing else (child < v):
+            v = child
+            move = action
+        if maximizing:
+            low = max(low, v)
+        else:
+            high = min(high, v)
+        if low >= high:
+            if stats is not None:
+                stats.cutoffs += 1
+            break
+
+    # Narrow the stored bounds by what this window proved
+    if v <= alpha:
+        upper = min(upper, v)
+    elif v >= beta:
+        lower = max(lower, v)
+    else:
+        lower = upper = v
+    bounds.store(key, (lower, upper, SYMMETRIES[symmetry].index(move)))
+    return v, move
+
+
+def ordered_actions(board, first=None):
+    """
+    Returns the possible actions in search order: `first` if given, then
+    the center, the corners and the edges.
+    """
+    shape = (len(board), len(board[0]))
+    if shape not in ORDERS:
+        ORDERS[shape] = move_order(*shape)
+    moves = [(i, j) for i, j in ORDERS[shape] if board[i][j] is EMPTY]
+    if first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+class Timeout(Exception):
+    """
+    Raised inside the depth-limited search once its deadline has passed
+    or it has been cancelled.
+    """
+
+
+def deepening(board, k=3, budget=MOVE_BUDGET, cancel=None, stats=None):
+    """
+    Returns the best move found by depth-limited alpha-beta searches of
+    increasing depth, stopping once `budget` seconds have passed or the
+    `cancel` event is set. Only depths searched to the end decide the move.
+    """
+    deadline = time.perf_counter() + budget
+    best_moves = {}
+    moves = ordered_actions(board)
+    best = moves[0]
+
+    for depth in range(1, len(moves) + 1):
+        try:
+            value, move = Limited(board, k, depth, -math.inf, math.inf,
+                                  deadline, best_moves, cancel, stats)
+        except Timeout:
+            break
+        best = move
+
+        # A forced win or loss cannot change at greater depths
+        if abs(value) > 1:
+            break
+
+    return best
+
+
+def Limited(board, k, depth, alpha, beta, deadline, best_moves, cancel=None,
+            stats=None, played=0):
+    """
+    Returns (value, move) from an alpha-beta search `depth` moves deep,
+    valuing positions at that depth by `evaluate`. `best_moves` keeps the
+    best move found in each position, to be tried first next time.
+    """
+    if time.perf_counter() > deadline or (cancel and cancel.is_set()):
+        raise Timeout
+    if stats is not None:
+        stats.visit(played)
+
+    won = winner(board, k)
+    moves = actions(board)
+    if won is not None or not moves or depth == 0:
+        if stats is not None:
+            stats.terminals += 1
+        if won is not None:
+            return (WIN - played if won == X else played - WIN), None
+        if not moves:
+            return 0, None
+        return evaluate(board, k), None
+
+    key = "".join(cell or "-" for row in board for cell in row)
+    maximizing = player(board) == X
+    v = -math.inf if maximizing else math.inf
+    move = None
+    for action in ordered_actions(board, best_moves.get(key)):
+        child = Limited(result(board, action), k, depth - 1, alpha, beta,
+                        deadline, best_moves, cancel, stats, played + 1)[0]
+        if (child > v) if maximizing else (child < v):
+            v = child
+            move = action
+        if maximizing:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            if stats is not None:
+                stats.cutoffs += 1
+            break
+
+    best_moves[key] = move
+    return v, move
+
+
+def evaluate(board, k=3):
+    """
+    Returns a heuristic value between -1 and 1 for a position that is not
+    over, favouring X. Each line still open to only one player counts for
+    that player, ten times more for each mark already in it.
+    """
+    score = 0
+    for line in lines(len(board), len(board[0]), k):
+        x_count = o_count = 0
+        for i, j in line:
+            if board[i][j] == X:
+                x_count += 1
+            elif board[i][j] == O:
+                o_count += 1
+        if x_count and not o_count:
+            score += 10 ** (x_count - 1)
+        elif o_count and not x_count:
+            score -= 10 ** (o_count - 1)
+    return score / (1 + abs(score))
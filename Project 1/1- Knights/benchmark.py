@@ -0,0 +1,232 @@
+"""
+Times the per-symbol `model_check` loop of `puzzle.main` as it was, with
+pruning by partial models and with compiled sentences, against the batch
+entailment checks, which answer every query from one enumeration of the
+models or one solver session.
+
+Run as a script, it times the four puzzles, on the six symbols
+`puzzle.main` checks, and then generated puzzles with the given numbers
+of people, each of whom makes one random claim, on all of their symbols.
+With --build, it instead measures the memory a generated knowledge base
+takes, as built and frozen, and the time to build it and take its
+symbols and hash. With --nodes, it counts the models `model_check`
+visits for the same queries, with and without pruning by partial models.
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from logic import *
+from puzzle import (knowledge0, knowledge1, knowledge2, knowledge3,
+                    AKnight, AKnave, BKnight, BKnave, CKnight, CKnave)
+from sat import sat_check_all
+from truth import truth_check_all
+
+# Generated puzzles with this many people by default, and with --build
+PEOPLE = [4, 6, 8]
+BUILD_PEOPLE = [1000, 10000]
+
+
+def main():
+    args = sys.argv[1:]
+    flags = {arg for arg in args if arg.startswith("--")}
+    args = [arg for arg in args if not arg.startswith("--")]
+    if not all(arg.isdigit() for arg in args) or len(flags) > 1 or not (
+        flags <= {"--build", "--nodes"}
+    ):
+        sys.exit("Usage: python benchmark.py [--build | --nodes] [people ...]")
+    if "--build" in flags:
+        build([int(arg) for arg in args] or BUILD_PEOPLE)
+        return
+    people = [int(arg) for arg in args] or PEOPLE
+
+    puzzles = [(f"Puzzle {i}", knowledge)
+               for i, knowledge in enumerate(
+                   [knowledge0, knowledge1, knowledge2, knowledge3])]
+    if "--nodes" in flags:
+        nodes(puzzles + [(f"{n} people", generate(n))
+                         for n in [int(arg) for arg in args]])
+        return
+    puzzles += [(f"{n} people", generate(n)) for n in people]
+
+    print("puzzle     queries   per-symbol       pruned     compiled"
+          "        batch        truth          sat")
+    for name, knowledge in puzzles:
+        queries = puzzle_queries(name, knowledge)
+
+        start = time.perf_counter()
+        expected = [query for query in queries
+                    if model_check(knowledge, query, prune=False)]
+        loop = time.perf_counter() - start
+
+        times = []
+        for check in [pruned_check_all, compiled_check_all, model_check_all,
+                      truth_check_all, sat_check_all]:
+            start = time.perf_counter()
+            entailed = check(knowledge, queries)
+            times.append(time.perf_counter() - start)
+            if entailed != expected:
+                raise Exception(f"{check.__name__} disagrees on {name}")
+
+        print(f"{name:<10} {len(queries):7} {loop * 1000:10.2f}ms"
+              + "".join(f" {seconds * 1000:10.2f}ms" for seconds in times))
+
+
+def puzzle_queries(name, knowledge):
+    """
+    Returns the six symbols `puzzle.main` checks for each of its puzzles,
+    or every symbol of a generated puzzle.
+    """
+    if name.startswith("Puzzle"):
+        return [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+    return [Symbol(symbol) for symbol in sorted(knowledge.symbols())]
+
+
+def pruned_check_all(knowledge, queries):
+    """
+    Returns the queries that knowledge base entails, checking each with
+    pruning by partial models.
+    """
+    return [query for query in queries
+            if model_check(knowledge, query, prune=True)]
+
+
+def compiled_check_all(knowledge, queries):
+    """
+    Returns the queries that knowledge base entails, checking each with
+    compiled sentences.
+    """
+    return [query for query in queries
+            if model_check(knowledge, query, compiled=True)]
+
+
+def nodes(puzzles):
+    """
+    Prints the models `model_check` visits, and the time it takes, for
+    every symbol of `puzzle.main`, or of a generated puzzle, with and
+    without pruning.
+    """
+    print("puzzle     queries     full   pruned    cut  full ms pruned ms")
+    for name, knowledge in puzzles:
+        queries = puzzle_queries(name, knowledge)
+
+        counts = []
+        times = []
+        for prune in [False, True]:
+            stats = CheckStats()
+            start = time.perf_counter()
+            for query in queries:
+                model_check(knowledge, query, prune=prune, stats=stats)
+            times.append(time.perf_counter() - start)
+            counts.append(stats)
+
+        full, pruned = counts
+        print(f"{name:<10} {len(queries):7} {full.nodes:8} "
+              f"{pruned.nodes:8} {pruned.pruned:6} "
+              f"{times[0] * 1000:8.2f} {times[1] * 1000:9.2f}")
+
+
+def build(people):
+    """
+    Prints the nodes and objects of generated knowledge bases, as built
+    and frozen, the memory each takes once its symbols and hash have been
+    taken, and the time to build it and to take its symbols and hash,
+    first and again.
+    """
+    print("people kind      nodes  objects     memory     build   symbols"
+          "     again      hash     again")
+    for n in people:
+        for kind in ["built", "frozen"]:
+            tracemalloc.start()
+            knowledge = generate(n)
+            if kind == "frozen":
+                knowledge = freeze(knowledge)
+            knowledge.symbols()
+            hash(knowledge)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            nodes, objects = count(knowledge)
+
+            # Time a different puzzle, without the tracing
+            times = []
+            start = time.perf_counter()
+            knowledge = generate(n, seed=1)
+            if kind == "frozen":
+                knowledge = freeze(knowledge)
+            times.append(time.perf_counter() - start)
+            for take in [knowledge.symbols, knowledge.__hash__]:
+                for _ in range(2):
+                    start = time.perf_counter()
+                    take()
+                    times.append(time.perf_counter() - start)
+
+            print(f"{n:6} {kind:<6} {nodes:8} {objects:8} "
+                  f"{memory / 2 ** 20:8.2f}MB"
+                  + "".join(f" {seconds * 1000:7.2f}ms" for seconds in times))
+
+
+def count(sentence):
+    """
+    Returns the number of nodes in the sentence's tree, and the number of
+    distinct objects among them, fewer once `freeze` shares equal nodes.
+    """
+    nodes = 0
+    objects = set()
+    frontier = [sentence]
+    while frontier:
+        sentence = frontier.pop()
+        nodes += 1
+        objects.add(id(sentence))
+        frontier.extend(sentence.operands())
+    return nodes, len(objects)
+
+
+def generate(n, seed=0):
+    """
+    Returns the knowledge base of a puzzle with `n` people, each a knight
+    or a knave, who each say something random about the others.
+    """
+    rng = random.Random(seed)
+    names = [chr(ord("A") + i) if i < 26 else f"P{i}" for i in range(n)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+    knowledge = And()
+    for i in range(n):
+        # Info about problem structure
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+
+        # Info about puzzle, with the claim spelled out for both kinds of
+        # speaker, as puzzle.py writes it
+        j, k = [p + (p >= i) for p in rng.sample(range(n - 1), 2)]
+        kind = rng.choice([knights, knaves])
+        form = rng.randrange(4)
+        knowledge.add(Implication(knights[i], claim(form, kind, i, j, k)))
+        knowledge.add(Implication(knaves[i],
+                                  Not(claim(form, kind, i, j, k))))
+    return knowledge
+
+
+def claim(form, kind, i, j, k):
+    """
+    Returns what person `i` claims about persons `j` and `k`, given the
+    symbols of one kind of person.
+    """
+    if form == 0:
+        # "J is a knight/knave."
+        return kind[j]
+    if form == 1:
+        # "J and K are both knights/knaves."
+        return And(kind[j], kind[k])
+    if form == 2:
+        # "J or K is a knight/knave."
+        return Or(kind[j], kind[k])
+    # "J and I are the same kind."
+    return Biconditional(kind[i], kind[j])
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,52 @@ import itertools
 
 
 class Sentence():
+    __slots__ = ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        unassigned, returning None if its value depends on them.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
+    def operands(self):
+        """Returns the sentences the logical sentence is built from."""
+        return ()
+
+    def expression(self, bits):
+        """
+        Returns Python source evaluating the logical sentence in model `m`,
+        an integer whose bit `bits[name]` is the value of symbol `name`.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, bits):
+        """
+        Returns a function of an integer model that evaluates the logical
+        sentence, like `evaluate`, given the bit of each symbol's name.
+        """
+        return eval(f"lambda m: bool({self.expression(bits)})")
+
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        names = set()
+        frontier = [self]
+        while frontier:
+            sentence = frontier.pop()
+            if isinstance(sentence, Symbol):
+                names.add(sentence.name)
+            else:
+                frontier.extend(sentence.operands())
+        return frozenset(names)
 
     @classmethod
     def validate(cls, sentence):
@@ -43,6 +77,7 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
@@ -62,20 +97,33 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return frozenset([self.name])
+
+    def expression(self, bits):
+        try:
+            return f"(m & {1 << bits[self.name]})"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (isinstance(other, Not)
+                                 and self.operand == other.operand)
 
     def __hash__(self):
         return hash(("not", hash(self.operand)))
@@ -86,21 +134,31 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def partial(self, model):
+        value = self.operand.partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def operands(self):
+        return (self.operand,)
+
+    def expression(self, bits):
+        return f"(not {self.operand.expression(bits)})"
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (isinstance(other, And)
+                                 and self.conjuncts == other.conjuncts)
 
     def __hash__(self):
         return hash(
@@ -120,24 +178,43 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def partial(self, model):
+        value = True
+        for conjunct in self.conjuncts:
+            known = conjunct.partial(model)
+            if known is False:
+                return False
+            if known is None:
+                value = None
+        return value
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def operands(self):
+        return self.conjuncts
+
+    def expression(self, bits):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join([conjunct.expression(bits)
+                                   for conjunct in self.conjuncts]) + ")"
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (isinstance(other, Or)
+                                 and self.disjuncts == other.disjuncts)
 
     def __hash__(self):
         return hash(
@@ -151,17 +228,35 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def partial(self, model):
+        value = False
+        for disjunct in self.disjuncts:
+            known = disjunct.partial(model)
+            if known is True:
+                return True
+            if known is None:
+                value = None
+        return value
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def operands(self):
+        return self.disjuncts
+
+    def expression(self, bits):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join([disjunct.expression(bits)
+                                  for disjunct in self.disjuncts]) + ")"
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -169,9 +264,9 @@ class Implication(Sentence):
         self.consequent = consequent
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
     def __hash__(self):
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
@@ -183,16 +278,34 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def partial(self, model):
+        antecedent = self.antecedent.partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def expression(self, bits):
+        antecedent = self.antecedent.expression(bits)
+        consequent = self.consequent.expression(bits)
+        return f"(not {antecedent} or {consequent})"
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -200,9 +313,9 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
 
     def __hash__(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
@@ -216,20 +329,160 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def partial(self, model):
+        left = self.left.partial(model)
+        if left is None:
+            return None
+        right = self.right.partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
+    def operands(self):
+        return (self.left, self.right)
+
+    def expression(self, bits):
+        left = self.left.expression(bits)
+        right = self.right.expression(bits)
+        return f"((not {left}) == (not {right}))"
+
+
+class Frozen():
+    """
+    A logical sentence built by `freeze`, from operands that are frozen
+    too. It can no longer change, so it computes its hash once, when it
+    is built, and its symbols once, when first asked for them.
+    """
+    __slots__ = ()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._hash = super().__hash__()
+        self._symbols = None
+
+    def __hash__(self):
+        return self._hash
+
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        if self._symbols is None:
+            names = set()
+            seen = set()
+            frontier = [self]
+            while frontier:
+                sentence = frontier.pop()
+                if isinstance(sentence, Symbol):
+                    names.add(sentence.name)
+                elif sentence._symbols is not None:
+                    names.update(sentence._symbols)
+                elif id(sentence) not in seen:
+                    # Walk each shared node once
+                    seen.add(id(sentence))
+                    frontier.extend(sentence.operands())
+            self._symbols = frozenset(names)
+        return self._symbols
+
+
+class FrozenSymbol(Frozen, Symbol):
+    __slots__ = ("_hash", "_symbols")
+
+
+class FrozenNot(Frozen, Not):
+    __slots__ = ("_hash", "_symbols")
+
+
+class FrozenAnd(Frozen, And):
+    __slots__ = ("_hash", "_symbols")
+
+    def add(self, conjunct):
+        raise Exception("cannot add to a frozen sentence")
+
+
+class FrozenOr(Frozen, Or):
+    __slots__ = ("_hash", "_symbols")
+
+
+class FrozenImplication(Frozen, Implication):
+    __slots__ = ("_hash", "_symbols")
+
+
+class FrozenBiconditional(Frozen, Biconditional):
+    __slots__ = ("_hash", "_symbols")
+
+
+# Frozen class of each kind of sentence
+FROZEN = {
+    Symbol: FrozenSymbol,
+    Not: FrozenNot,
+    And: FrozenAnd,
+    Or: FrozenOr,
+    Implication: FrozenImplication,
+    Biconditional: FrozenBiconditional
+}
+FROZEN.update({frozen: frozen for frozen in list(FROZEN.values())})
+
 
+def freeze(sentence, nodes=None):
+    """
+    Returns a frozen copy of the sentence, equal to it, in which equal
+    subformulas are one object. `nodes` maps frozen sentences to
+    themselves; pass the same dict to share nodes between sentences.
+    """
+    if nodes is None:
+        nodes = {}
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    # Frozen copies of the objects already seen, by id
+    copies = {}
+
+    def copy(sentence):
+        if id(sentence) in copies:
+            return copies[id(sentence)]
+        try:
+            kind = FROZEN[type(sentence)]
+        except KeyError:
+            raise Exception(f"cannot freeze {sentence}")
+        if kind is FrozenSymbol:
+            node = FrozenSymbol(sentence.name)
+        else:
+            node = kind(*[copy(operand) for operand in sentence.operands()])
+        node = copies[id(sentence)] = nodes.setdefault(node, node)
+        return node
+
+    node = copy(sentence)
+
+    # copy refers to itself, so break the cycle to free the tables now
+    # rather than at the next garbage collection
+    del copy
+    return node
+
+
+class CheckStats():
+    """
+    Counts of the models `model_check` visited, complete or not, and of
+    the partial models whose whole branch it cut.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.pruned = 0
+
+
+def model_check(knowledge, query, compiled=False, prune=True, stats=None):
+    """
+    Checks if knowledge base entails query, evaluating compiled sentences
+    over integer models if `compiled` is true. Otherwise, unless `prune`
+    is false, a partial model is not extended once it decides the answer.
+    Adds the models visited to `stats`, a CheckStats, if given.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
+        if stats is not None:
+            stats.nodes += 1
 
         # If model has an assignment for each symbol
         if not symbols:
@@ -240,6 +493,19 @@ def model_check(knowledge, query):
             return True
         else:
 
+            # Stop once model decides the answer whatever values the
+            # remaining symbols take: true if knowledge base is false or
+            # query true, false if knowledge base is true and query false
+            if prune:
+                known = knowledge.partial(model)
+                answer = True if known is False else query.partial(model)
+                if answer is False and known is None:
+                    answer = None
+                if answer is not None:
+                    if stats is not None:
+                        stats.pruned += 1
+                    return answer
+
             # Choose one of the remaining unused symbols
             remaining = symbols.copy()
             p = remaining.pop()
@@ -257,7 +523,35 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
+
+    if compiled:
+        # Model `m` gives each symbol the value of one of its bits
+        bits = {symbol: i for i, symbol in enumerate(sorted(symbols))}
+        knowledge = knowledge.compile(bits)
+        query = query.compile(bits)
+        return all(query(m) for m in range(1 << len(bits)) if knowledge(m))
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_all(knowledge, queries):
+    """Returns the queries that knowledge base entails, in one pass over its models."""
+
+    # Get all symbols in knowledge and every query
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+
+    # Queries true in every model of knowledge base seen so far
+    entailed = list(queries)
+    for values in itertools.product([True, False], repeat=len(symbols)):
+        model = dict(zip(symbols, values))
+
+        # A model of knowledge base rules out every query false in it
+        if knowledge.evaluate(model):
+            entailed = [query for query in entailed if query.evaluate(model)]
+            if not entailed:
+                break
+    return entailed
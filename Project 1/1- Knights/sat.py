@@ -0,0 +1,377 @@
+"""
+Entailment by satisfiability.
+
+A knowledge base entails a query exactly when the knowledge base and the
+negated query have no model in common. `sat_check` encodes both into
+clauses with the Tseitin transformation and asks a conflict-driven
+clause learning (CDCL) solver whether any assignment satisfies them all,
+instead of enumerating every model the way `model_check` does.
+
+Variables are numbered from 1, and a literal is a variable `v` (true)
+or `-v` (false), as in the DIMACS format.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Value of a literal under the current assignment
+TRUE = 1
+FALSE = -1
+UNASSIGNED = 0
+
+# Activity decay of the variable ordering, and conflicts before the first
+# restart, growing by RESTART_GROWTH after each one
+DECAY = 0.95
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, like `model_check`."""
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return not encoder.solver.solve([-encoder.literal(query)])
+
+
+def sat_check_all(knowledge, queries):
+    """Returns the queries that knowledge base entails, in one solver session."""
+    encoder = Encoder()
+    encoder.add(knowledge)
+    solver = encoder.solver
+    literals = [encoder.literal(query) for query in queries]
+    if not solver.solve():
+        return list(queries)
+
+    # Every model found rules out the queries false in it
+    candidates = [i for i, literal in enumerate(literals)
+                  if solver.value(literal) == TRUE]
+    entailed = []
+    while candidates:
+        i = candidates.pop(0)
+        if solver.solve([-literals[i]]):
+            candidates = [j for j in candidates
+                          if solver.value(literals[j]) == TRUE]
+        else:
+            entailed.append(i)
+    return [queries[i] for i in sorted(entailed)]
+
+
+class Solver():
+    """CDCL solver with two watched literals per clause."""
+
+    def __init__(self):
+        self.clauses = []
+        # Indices of the clauses watching each literal
+        self.watches = {}
+        self.values = [UNASSIGNED]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.order = []
+        self.increment = 1.0
+        # Literals in the order they were assigned, and where each
+        # decision level starts in it
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.unsatisfiable = False
+        self.conflicts = 0
+
+    def variable(self):
+        """Returns a new variable."""
+        self.values.append(UNASSIGNED)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        var = len(self.values) - 1
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def value(self, literal):
+        """Returns TRUE, FALSE or UNASSIGNED for a literal."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """Adds a clause, given as a list of literals, at decision level 0."""
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value == TRUE or -literal in clause:
+                return
+            if value == UNASSIGNED and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores a clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        """Makes a literal true, implied by clause `reason` or decided."""
+        var = abs(literal)
+        self.values[var] = TRUE if literal > 0 else FALSE
+        self.levels[var] = len(self.limits)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by a clause with one literal left,
+        and returns the index of a clause left false, or None.
+        """
+        values = self.values
+        clauses = self.clauses
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if (values[first] if first > 0 else -values[-first]) == TRUE:
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    if (values[other] if other > 0
+                            else -values[-other]) != FALSE:
+                        clause[1], clause[k] = other, false
+                        self.watches[other].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if (values[first] if first > 0
+                            else -values[-first]) == FALSE:
+                        kept.extend(watching[position + 1:])
+                        self.watches[false] = kept
+                        return index
+                    self.assign(first, index)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, cut at the first unique
+        implication point, and the level to backtrack to.
+        """
+        level = len(self.limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        index = conflict
+        while True:
+            for other in self.clauses[index]:
+                var = abs(other)
+                if literal is not None and var == abs(literal):
+                    continue
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve on the latest assigned literal of this level
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+            index = self.reasons[abs(literal)]
+        learned[0] = -literal
+
+        # Watch the literal that will be unassigned last
+        back = 0
+        for k in range(1, len(learned)):
+            if self.levels[abs(learned[k])] > back:
+                back = self.levels[abs(learned[k])]
+                learned[1], learned[k] = learned[k], learned[1]
+        return learned, back
+
+    def bump(self, var):
+        """Raises a variable's activity, so it is decided on sooner."""
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, len(self.values))
+                          if self.values[v] == UNASSIGNED]
+            heapq.heapify(self.order)
+        elif self.values[var] == UNASSIGNED:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        """Unassigns every literal above decision level `level`."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.values[var] = UNASSIGNED
+            self.reasons[var] = None
+            self.phases[var] = literal > 0
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def decide(self):
+        """Returns the unassigned variable with the most activity, or None."""
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if self.values[var] == UNASSIGNED:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses have a model where every literal in
+        `assumptions` is true, and False otherwise. Clauses learned along
+        the way are kept for later calls.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+        restart = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.unsatisfiable = True
+                    return False
+                self.conflicts += 1
+                conflicts += 1
+                learned, back = self.analyze(conflict)
+                self.backtrack(back)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.increment /= DECAY
+                if conflicts >= restart:
+                    conflicts = 0
+                    restart *= RESTART_GROWTH
+                    self.backtrack(0)
+                continue
+
+            # Decide the assumptions first, one level each
+            literal = None
+            while len(self.limits) < len(assumptions):
+                assumption = assumptions[len(self.limits)]
+                value = self.value(assumption)
+                if value == FALSE:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if value == UNASSIGNED:
+                    literal = assumption
+                    break
+            if literal is None:
+                var = self.decide()
+                if var is None:
+                    return True
+                literal = var if self.phases[var] else -var
+                self.limits.append(len(self.trail))
+            self.assign(literal, None)
+
+    def model(self):
+        """Returns the value of every variable after a satisfiable solve."""
+        return {var: self.values[var] == TRUE
+                for var in range(1, len(self.values))}
+
+
+class Encoder():
+    """Tseitin encoding of sentences into a solver's clauses."""
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        # Variables of symbol names, and literals of encoded sentences
+        self.variables = {}
+        self.literals = {}
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when the sentence is."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.solver.variable()
+            return self.variables[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        define = self.solver.add_clause
+        out = self.solver.variable()
+        if isinstance(sentence, (And, Or)):
+            operands = (sentence.conjuncts if isinstance(sentence, And)
+                        else sentence.disjuncts)
+            parts = [self.literal(operand) for operand in operands]
+            # For Or, out = ¬(¬a ∧ ¬b ∧ ...): encode And over negations
+            sign = 1 if isinstance(sentence, And) else -1
+            for part in parts:
+                define([-sign * out, sign * part])
+            define([sign * out] + [-sign * part for part in parts])
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            define([-out, -a, b])
+            define([out, a])
+            define([out, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            define([-out, -a, b])
+            define([-out, a, -b])
+            define([out, a, b])
+            define([out, -a, -b])
+        else:
+            raise Exception(f"cannot encode {sentence}")
+        self.literals[sentence] = out
+        return out
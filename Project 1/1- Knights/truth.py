@@ -0,0 +1,122 @@
+"""
+Truth tables of whole sentences at once.
+
+Each symbol gets a column: an integer whose bit `m` is the symbol's value
+in model `m`, for every model of the symbols at once. A sentence is then
+evaluated a single time, with its connectives applied as bitwise
+operations on whole columns, instead of once per model the way
+`model_check` does.
+
+Past CHUNK_SYMBOLS symbols, the models are taken in chunks of
+2 ** CHUNK_SYMBOLS, with the remaining symbols fixed in each chunk, so a
+column never grows beyond that many bits.
+"""
+
+import itertools
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol, freeze
+
+# Symbols whose models are covered by one column
+CHUNK_SYMBOLS = 20
+
+
+def truth_check(knowledge, query):
+    """Checks if knowledge base entails query, like `model_check`."""
+    # Equal subformulas share one node, whose column is then taken once
+    nodes = {}
+    knowledge = freeze(knowledge, nodes)
+    query = freeze(query, nodes)
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    low, high = symbols[:CHUNK_SYMBOLS], symbols[CHUNK_SYMBOLS:]
+    columns, full = symbol_columns(low)
+
+    # Models of the first symbols in each column, the rest fixed per chunk
+    for values in itertools.product([full, 0], repeat=len(high)):
+        columns.update(zip(high, values))
+        cache = {}
+        if evaluate(knowledge, columns, full, cache) & \
+                ~evaluate(query, columns, full, cache) & full:
+            return False
+    return True
+
+
+def truth_check_all(knowledge, queries):
+    """Returns the queries that knowledge base entails, in one pass."""
+    nodes = {}
+    knowledge = freeze(knowledge, nodes)
+    frozen = [freeze(query, nodes) for query in queries]
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in frozen]
+    ))
+    low, high = symbols[:CHUNK_SYMBOLS], symbols[CHUNK_SYMBOLS:]
+    columns, full = symbol_columns(low)
+
+    # Each query with its frozen copy
+    entailed = list(zip(queries, frozen))
+    for values in itertools.product([full, 0], repeat=len(high)):
+        columns.update(zip(high, values))
+        cache = {}
+        models = evaluate(knowledge, columns, full, cache)
+        entailed = [(query, copy) for query, copy in entailed
+                    if not models & ~evaluate(copy, columns, full, cache)]
+        if not entailed:
+            break
+    return [query for query, _ in entailed]
+
+
+def symbol_columns(symbols):
+    """
+    Returns the column of each symbol over all 2 ** n models of `n`
+    symbols, and the column of all models.
+    """
+    models = 1 << len(symbols)
+    columns = {}
+    for i, symbol in enumerate(symbols):
+        # Runs of 2 ** i models where the symbol is false, then true
+        run = 1 << i
+        column = ((1 << run) - 1) << run
+        period = 2 * run
+        while period < models:
+            column |= column << period
+            period *= 2
+        columns[symbol] = column
+    return columns, (1 << models) - 1
+
+
+def evaluate(sentence, columns, full, cache=None):
+    """
+    Returns the column of models in which the sentence is true, given the
+    column of each symbol's name and the column of all models.
+    """
+    if cache is None:
+        cache = {}
+    key = id(sentence)
+    if key in cache:
+        return cache[key]
+
+    if isinstance(sentence, Symbol):
+        try:
+            value = columns[sentence.name]
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    elif isinstance(sentence, Not):
+        value = full ^ evaluate(sentence.operand, columns, full, cache)
+    elif isinstance(sentence, And):
+        value = full
+        for conjunct in sentence.conjuncts:
+            value &= evaluate(conjunct, columns, full, cache)
+    elif isinstance(sentence, Or):
+        value = 0
+        for disjunct in sentence.disjuncts:
+            value |= evaluate(disjunct, columns, full, cache)
+    elif isinstance(sentence, Implication):
+        value = (full ^ evaluate(sentence.antecedent, columns, full, cache)
+                 ) | evaluate(sentence.consequent, columns, full, cache)
+    elif isinstance(sentence, Biconditional):
+        value = full ^ (evaluate(sentence.left, columns, full, cache)
+                        ^ evaluate(sentence.right, columns, full, cache))
+    else:
+        raise Exception(f"cannot evaluate {sentence}")
+
+    cache[key] = value
+    return value